@@ -0,0 +1,11 @@
+'''Benchmarks for Docify.
+
+Run the suite and compare two runs from the root of the repository: ::
+
+    python -m benchmarks run -o before.json
+    python -m benchmarks run -o after.json
+    python -m benchmarks compare before.json after.json
+
+The other modules benchmark single features, e.g.
+``python -m benchmarks.traversal``.
+'''
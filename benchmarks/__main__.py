@@ -0,0 +1,56 @@
+import argparse
+import json
+import sys
+
+from benchmarks import suite
+from benchmarks.generators import SHAPES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command')
+
+    run = commands.add_parser('run', help='run the benchmark suite')
+    run.add_argument('-o', '--output', help='JSON file to write, default is stdout')
+    run.add_argument('-s', '--shape', action='append', choices=sorted(SHAPES),
+                     help='shape to run, can be repeated, default is all')
+    run.add_argument('--scale', type=float, default=1.0,
+                     help='factor applied to the size of documents')
+    run.add_argument('--repeat', type=int, default=3,
+                     help='number of runs to take the best time from')
+
+    compare = commands.add_parser('compare', help='compare two runs')
+    compare.add_argument('old', help='JSON results of the reference run')
+    compare.add_argument('new', help='JSON results of the run to check')
+    compare.add_argument('-t', '--threshold', type=float, default=0.1,
+                         help='relative increase flagged as regression')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        results = suite.run(args.shape, args.scale, args.repeat, log=sys.stderr)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        else:
+            json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        return 0
+
+    if args.command == 'compare':
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        rows = suite.compare(old, new, args.threshold)
+        for key, a, b, ratio, regressed in rows:
+            print('{:<34}{:>14.6g}{:>14.6g}{:>9.2f}x{}'.format(
+                key, a, b, ratio, '  REGRESSION' if regressed else ''))
+        regressions = sum(1 for row in rows if row[-1])
+        print('{} regression(s) over {:.0%}'.format(regressions, args.threshold))
+        return 1 if regressions else 0
+
+    parser.print_help()
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+'''Measures the time to build deeply nested documents bottom-up, the
+natural style of ``Section(Ul(Li(...)))``, and top-down with add().
+
+Usage: ::
+
+    python -m benchmarks.construction
+'''
+import time
+
+from docify import Document, components as c
+
+
+def bottom_up(depth):
+    node = c.Li('Leaf')
+    for i in range(depth):
+        node = c.Blockquote(c.P('Level {}'.format(i)), c.Ul(node))
+    return Document(node)
+
+
+def top_down(depth):
+    doc = Document()
+    node = c.Li('Root')
+    doc.add(c.Ul(node))
+    for i in range(depth):
+        child = c.Li('Level {}'.format(i))
+        node.add(c.Ul(child))
+        node = child
+    return doc
+
+
+if __name__ == '__main__':
+    print('{:<12}{:>8}{:>12}'.format('style', 'depth', 'seconds'))
+    for depth in (100, 1000, 5000):
+        for build in (bottom_up, top_down):
+            start = time.time()
+            build(depth)
+            print('{:<12}{:>8}{:>12.4f}'.format(
+                build.__name__, depth, time.time() - start))
@@ -0,0 +1,60 @@
+'''Simulates a nightly batch with docify.lib.diskcache: renders a set of
+documents into a cold cache, then again after a tenth of them changed,
+and compares against rendering without the cache.
+
+Usage: ::
+
+    python -m benchmarks.diskcache [number of documents]
+'''
+import shutil
+import sys
+import tempfile
+import time
+
+from docify import Document, components as c
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+from docify.lib.diskcache import DiskCache
+
+
+class Discard(object):
+
+    def write(self, chunk):
+        pass
+
+
+def report(i, night):
+    version = night if i % 10 == 0 else 0
+    return Document(
+        c.H1('Report {} v{}'.format(i, version)),
+        *[c.Section(c.P('Paragraph {} of report {} with *some* text. '.format(j, i) * 3),
+                    c.Ul(*[c.Li(c.B(k), ' item & more') for k in range(5)]))
+          for j in range(50)])
+
+
+def batch(docs, formatter, cache=None):
+    start = time.perf_counter()
+    for doc in docs:
+        f = formatter(doc, copy=False)
+        if cache is None:
+            f.render_to(Discard())
+        else:
+            cache.render_to(f, Discard())
+    return (time.perf_counter() - start) / len(docs) * 1e3
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    first = [report(i, 1) for i in range(n)]
+    second = [report(i, 2) for i in range(n)]
+    print('{:<10}{:>12}{:>12}{:>12}'.format('format', 'no cache', 'cold', 'warm'))
+    for formatter in (HTML, Markdown):
+        path = tempfile.mkdtemp()
+        try:
+            cache = DiskCache(path)
+            row = [batch(second, formatter), batch(first, formatter, cache),
+                   batch(second, formatter, cache)]
+            print('{:<10}{:>9.2f} ms{:>9.2f} ms{:>9.2f} ms  {}'.format(
+                formatter.__name__, *(row + [cache.stats()])))
+        finally:
+            shutil.rmtree(path)
@@ -0,0 +1,51 @@
+'''Compares the shared escapers of docify.lib.escape against escaping every
+string on its own with html.escape and re.sub, on short table cells and on
+long paragraphs.
+
+Usage: ::
+
+    python -m benchmarks.escape
+'''
+import re
+import timeit
+
+from docify.lib.escape import HTML_ESCAPER, MARKDOWN_ESCAPER
+
+try:
+    from html import escape
+except ImportError:
+    from cgi import escape
+
+
+def cells(n):
+    '''Short cells, mostly plain and often repeated.'''
+    values = ['ok', 'failed', 'n/a', 'a < b', 'x_y', '*', 'R&D']
+    return ['{}'.format(i) if i % 2 else values[i % len(values)] for i in range(n)]
+
+
+def paragraphs(n):
+    '''Long paragraphs, some of which need escaping.'''
+    text = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 20
+    return ['{} {}{}'.format(text, i, ' <b> & snake_case *x*' if i % 4 == 0 else '')
+            for i in range(n)]
+
+
+def bench(name, values, number=20):
+    md = re.compile(r'((([_*]).+?\3[^_*]*)*)([_*])')
+    cases = [
+        ('html.escape', lambda: [escape(x, quote=False) for x in values]),
+        ('HTML_ESCAPER', lambda: [HTML_ESCAPER.escape(x) for x in values]),
+        ('HTML_ESCAPER.bulk', lambda: HTML_ESCAPER.bulk(values)),
+        ('re.sub', lambda: [md.sub(r'\g<1>\\\\\g<4>', x) for x in values]),
+        ('MARKDOWN_ESCAPER', lambda: [MARKDOWN_ESCAPER.escape(x) for x in values]),
+    ]
+    for label, f in cases:
+        t = min(timeit.repeat(f, number=number, repeat=3))
+        print('{:<12}{:<20}{:>12.3f}'.format(
+            name, label, t / number / len(values) * 1e9))
+
+
+if __name__ == '__main__':
+    print('{:<12}{:<20}{:>12}'.format('workload', 'escaper', 'ns/string'))
+    bench('cells', cells(100000))
+    bench('paragraphs', paragraphs(2000))
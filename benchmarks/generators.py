@@ -0,0 +1,76 @@
+'''Synthetic documents of various shapes for the benchmarks.'''
+from docify import Document, components as c
+
+
+VALUES = ['OK', '-', 0, 'FAIL', 1.5]
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do '
+         'eiusmod tempor incididunt ut labore et dolore magna aliqua').split()
+
+
+def wide(n):
+    '''Document with n paragraphs at the top level.'''
+    return Document(*[c.P('Paragraph {}'.format(i), c.B('bold')) for i in range(n)])
+
+
+def deep(n):
+    '''Document with n nested blockquotes, built top-down.'''
+    doc = Document()
+    node = c.Blockquote()
+    doc.add(node)
+    for i in range(n):
+        child = c.Blockquote('Level {}'.format(i))
+        node.add(child)
+        node = child
+    return doc
+
+
+def table(rows, cols=4):
+    '''Document with a table of repeated cell values.'''
+    return Document(c.Table(
+        c.Tr(*[c.Th('Column {}'.format(j)) for j in range(cols)]),
+        *[c.Tr(*[c.Td(VALUES[(i + j) % len(VALUES)]) for j in range(cols)])
+          for i in range(rows)]))
+
+
+def text(n):
+    '''Document with n long paragraphs of mixed inline formatting.'''
+    doc = Document()
+    for i in range(n):
+        words = [WORDS[(i + j) % len(WORDS)] for j in range(100)]
+        doc.add(c.P(
+            ' '.join(words[:40]), c.B(' '.join(words[40:50])),
+            ' '.join(words[50:90]) + ' & <more> snake_case *text*',
+            c.I(' '.join(words[90:]))))
+    return doc
+
+
+def lists(n):
+    '''Document with n lists of ten items, every other one nested.'''
+    doc = Document()
+    for i in range(n):
+        items = [c.Li('Item {}'.format(j)) for j in range(10)]
+        if i % 2:
+            items.append(c.Ul(*[c.Li('Sub item {}'.format(j)) for j in range(5)]))
+        doc.add(c.Ol(*items) if i % 3 else c.Ul(*items))
+    return doc
+
+
+def count(doc):
+    '''Number of components in the document.'''
+    n, stack = 0, list(doc.components)
+    while stack:
+        x = stack.pop()
+        n += 1
+        stack.extend(getattr(x, 'components', ()))
+    return n
+
+
+# Name of each shape with its generator and default size
+SHAPES = {
+    'wide': (wide, 10000),
+    'deep': (deep, 2000),
+    'table': (table, 10000),
+    'text': (text, 1000),
+    'lists': (lists, 2000),
+}
@@ -0,0 +1,42 @@
+'''Measures the memory held by documents: bytes per component and the
+memory saved by building in compact mode.
+
+Usage: ::
+
+    python -m benchmarks.memory [number of components]
+'''
+import sys
+import tracemalloc
+
+from docify import components as c
+
+from benchmarks.generators import count, table
+
+
+def measure(build):
+    tracemalloc.start()
+    doc = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return doc, size
+
+
+def build_compact():
+    with c.compact():
+        return table(5000, 20)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    # Each row holds 1 TableRow, 4 TableData and 4 Text components
+    doc, size = measure(lambda: table(n // 9, 4))
+    print('{} components: {:.1f} bytes per component'.format(
+        count(doc), float(size) / count(doc)))
+    del doc
+
+    _, normal = measure(lambda: table(5000, 20))
+    _, compact = measure(build_compact)
+    print('normal   {:>8.1f} MiB'.format(normal / 2.0 ** 20))
+    print('compact  {:>8.1f} MiB'.format(compact / 2.0 ** 20))
+    print('saved    {:>8.1f} MiB ({:.0%})'.format(
+        (normal - compact) / 2.0 ** 20, 1 - float(compact) / normal))
@@ -0,0 +1,49 @@
+'''Measures how render_parallel() scales with the number of processes,
+from 1 to the number of CPUs by default. The efficiency is the speedup
+over a serial render divided by the number of processes.
+
+Usage: ::
+
+    python -m benchmarks.parallel [max workers]
+'''
+import multiprocessing
+import sys
+import time
+
+from docify import Document, components as c
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+
+def sections(n):
+    '''Document with n independent top-level sections and tables.'''
+    doc = Document()
+    for i in range(n):
+        doc.add(c.Section(
+            c.H2('Section {}'.format(i)),
+            c.P('Some ', c.B('bold'), ' and ', c.I('italic'), ' text.'),
+            c.Ul(*[c.Li('Item {}'.format(j)) for j in range(10)])))
+        doc.add(c.Table(*[c.Tr(c.Td(j), c.Td(j * i)) for j in range(20)]))
+    return doc
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else multiprocessing.cpu_count()
+    doc = sections(2000)
+    print('{} CPUs'.format(multiprocessing.cpu_count()))
+    print('{:<10}{:>8}{:>10}{:>10}{:>12}'.format(
+        'format', 'workers', 'seconds', 'speedup', 'efficiency'))
+    for formatter in (HTML, Markdown):
+        f = formatter(doc, copy=False)
+        start = time.time()
+        f.render()
+        serial = time.time() - start
+        print('{:<10}{:>8}{:>10.3f}{:>10.2f}{:>12}'.format(
+            formatter.__name__, 'serial', serial, 1, ''))
+        for workers in range(1, n + 1):
+            start = time.time()
+            f.render_parallel(workers)
+            t = time.time() - start
+            print('{:<10}{:>8}{:>10.3f}{:>10.2f}{:>11.0f}%'.format(
+                formatter.__name__, workers, t, serial / t,
+                100 * serial / t / workers))
@@ -0,0 +1,86 @@
+'''Compares the binary format of docify.lib.serialize against pickle: size,
+time to dump and time to load. Then renders a table from a file loaded
+lazily, to show the memory held while streaming.
+
+Pickle follows the links between siblings recursively, so the recursion
+limit is raised for it.
+
+Usage: ::
+
+    python -m benchmarks.serialize [number of rows]
+'''
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from docify.formatters.html import HTML
+from docify.lib.serialize import dump, dumps, load, loads
+
+from benchmarks.generators import count, table, text
+
+
+def best(f, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def bench(name, doc):
+    print('{} ({} nodes)'.format(name, count(doc)))
+    cases = [
+        ('pickle', lambda: pickle.dumps(doc, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        ('docify', lambda: dumps(doc), loads),
+    ]
+    for label, save, restore in cases:
+        try:
+            t_dump, data = best(save)
+            t_load, _ = best(lambda: restore(data))
+        except RecursionError:
+            print('  {:<8}RecursionError'.format(label))
+            continue
+        print('  {:<8}{:>10.1f} KiB{:>10.1f} ms dump{:>10.1f} ms load'.format(
+            label, len(data) / 1024.0, t_dump * 1e3, t_load * 1e3))
+
+
+class Discard(object):
+    '''Output counting what is written into it.'''
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, chunk):
+        self.size += len(chunk)
+
+
+def stream(rows):
+    fd, path = tempfile.mkstemp()
+    with os.fdopen(fd, 'wb') as f:
+        dump(table(rows, 4), f)
+    size = os.path.getsize(path)
+
+    for lazy in (False, True):
+        tracemalloc.start()
+        with open(path, 'rb') as f:
+            doc = load(f, lazy=lazy)
+        out = Discard()
+        HTML(doc, copy=False).render_to(out)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del doc
+        print('{:.1f} MiB file to {:.1f} MiB of HTML, lazy={}: peak {:.1f} MiB'.format(
+            size / 2.0 ** 20, out.size / 2.0 ** 20, lazy, peak / 2.0 ** 20))
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    sys.setrecursionlimit(100000)
+    bench('table', table(rows // 10, 4))
+    bench('text', text(1000))
+    stream(rows)
@@ -0,0 +1,100 @@
+'''Measures construction time, render time per formatter and peak memory
+for each document shape of :mod:`benchmarks.generators`.
+
+Results are a flat dict keyed by ``shape/step/metric``, where the metric
+is ``seconds`` or ``peak_bytes``, so two runs compare key by key.
+'''
+import datetime
+import platform
+import sys
+import timeit
+import tracemalloc
+
+from docify.formatters.html import HTML
+from docify.formatters.html_bootstrap import HTMLBootstrap
+from docify.formatters.markdown import Markdown
+
+from benchmarks.generators import SHAPES, count
+
+
+FORMATTERS = {
+    'html': lambda doc: HTML(doc, copy=False).render(),
+    'htmlbootstrap': lambda doc: HTMLBootstrap(doc, copy=False).render(),
+    'markdown': lambda doc: Markdown(doc, copy=False).render(),
+    'repr': repr,
+}
+
+
+def seconds(func, repeat):
+    '''Best wall time of a function over a number of runs.'''
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def peak(func):
+    '''Peak memory allocated while running a function, in bytes.'''
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(shapes=None, scale=1.0, repeat=3, log=None):
+    '''Runs the benchmarks and returns the results with some metadata.
+
+    :param list shapes: Names of the shapes to run. Default is all.
+    :param float scale: Factor applied to the default size of each shape.
+    :param int repeat: Number of runs to take the best time from.
+    :param file log: File to report progress to. Default is None.
+    '''
+    results = {}
+    for name in sorted(shapes or SHAPES):
+        build, size = SHAPES[name]
+        size = max(int(size * scale), 1)
+        results[name + '/size'] = size
+
+        results[name + '/build/seconds'] = seconds(lambda: build(size), repeat)
+        results[name + '/build/peak_bytes'] = peak(lambda: build(size))
+        doc = build(size)
+        results[name + '/nodes'] = count(doc)
+
+        for fname in sorted(FORMATTERS):
+            render = FORMATTERS[fname]
+            key = '{}/{}/'.format(name, fname)
+            results[key + 'seconds'] = seconds(lambda: render(doc), repeat)
+            results[key + 'peak_bytes'] = peak(lambda: render(doc))
+            if log is not None:
+                log.write('{:<10}{:<15}{:>10.4f}s\n'.format(
+                    name, fname, results[key + 'seconds']))
+        del doc
+
+    return {
+        'meta': {
+            'created': datetime.datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'scale': scale,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(old, new, threshold=0.1):
+    '''Compares the results of two runs. Returns a list of rows with the
+    key, the old value, the new value, their ratio and whether it is a
+    regression, i.e. the ratio exceeds 1 + threshold.
+
+    :param dict old: Results of the reference run.
+    :param dict new: Results of the run to check.
+    :param float threshold: Relative increase tolerated. Default is 0.1.
+    '''
+    rows = []
+    old, new = old['results'], new['results']
+    for key in sorted(set(old) & set(new)):
+        if not key.endswith(('/seconds', '/peak_bytes')):
+            continue
+        ratio = float(new[key]) / old[key] if old[key] else 1.0
+        rows.append((key, old[key], new[key], ratio, ratio > 1 + threshold))
+    return rows
@@ -0,0 +1,39 @@
+'''Compares the per-node overhead of the recursive format(), which joins a
+string for every composite, against render(), which writes fragments into
+a sink from an explicit stack.
+
+Usage: ::
+
+    python -m benchmarks.traversal
+'''
+import sys
+import timeit
+
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+from benchmarks.generators import count, deep, wide
+
+
+def bench(name, doc, number=5):
+    nodes = count(doc)
+    for formatter in (HTML, Markdown):
+        f = formatter(doc, copy=False)
+        row = [name, formatter.__name__, str(nodes)]
+        f.prepare()
+        for render in (lambda: f.format(f.doc), f.render):
+            try:
+                t = min(timeit.repeat(render, number=number, repeat=3))
+                row.append('{:.3f}'.format(t / number / nodes * 1e6))
+            except RuntimeError:
+                row.append('RecursionError')
+        print('{:<12}{:<10}{:>8}{:>16}{:>16}'.format(*row))
+
+
+if __name__ == '__main__':
+    print('{:<12}{:<10}{:>8}{:>16}{:>16}'.format(
+        'shape', 'format', 'nodes', 'format() us', 'render() us'))
+    bench('wide', wide(10000))
+    bench('deep-100', deep(100))
+    bench('deep-{}'.format(sys.getrecursionlimit()), deep(sys.getrecursionlimit()))
+    bench('deep-100000', deep(100000), number=1)
@@ -1,5 +1,8 @@
+__version__ = 'v0.4'
+
 from docify.lib.document import Document
 from docify.lib import components
+from docify.formatters import get_formatter
 
 
-__ALL__ = ['Document', 'components']
+__ALL__ = ['Document', 'components', 'get_formatter']
@@ -0,0 +1,103 @@
+'''Formatters, with a registry to get them by name. A formatter module is
+only imported when its formatter is requested, so scripts only pay for
+the formats they render.
+
+Third-party packages can provide formatters through the
+``docify.formatters`` entry point group, e.g. in their setup.py: ::
+
+    entry_points={
+        'docify.formatters': ['rst = docify_rst:RST'],
+    }
+
+Entry points are only looked up for names which aren't built in, and
+the packages providing them are only imported when requested.
+'''
+from importlib import import_module
+
+__all__ = ['ENTRY_POINTS', 'get_formatter', 'names', 'register']
+
+#: Entry point group of third-party formatters.
+ENTRY_POINTS = 'docify.formatters'
+
+# Formatter of each name: a 'module:class' path, an entry point or a class
+_registry = {
+    'html': 'docify.formatters.html:HTML',
+    'htmlbootstrap': 'docify.formatters.html_bootstrap:HTMLBootstrap',
+    'markdown': 'docify.formatters.markdown:Markdown',
+}
+_loaded = {}
+_scanned = [False]
+
+
+def register(name, formatter):
+    '''Registers a formatter under a name, replacing any other one.
+
+    :param str name: Name of the formatter, e.g. 'rst'.
+    :param type|str formatter: Formatter class, or its path as
+        'module:class' to import it on first use.
+    '''
+    _registry[name] = formatter
+    _loaded.pop(name, None)
+
+
+def _entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        try:
+            from pkg_resources import iter_entry_points
+        except ImportError:
+            return []
+        return list(iter_entry_points(ENTRY_POINTS))
+    eps = entry_points()
+    if hasattr(eps, 'select'):
+        return list(eps.select(group=ENTRY_POINTS))
+    return list(eps.get(ENTRY_POINTS, ()))
+
+
+def _scan():
+    '''Adds the formatters of the entry points, once. Registered names
+    take precedence.
+    '''
+    if not _scanned[0]:
+        _scanned[0] = True
+        for ep in _entry_points():
+            _registry.setdefault(ep.name, ep)
+
+
+def get_formatter(name):
+    '''Returns the formatter class registered under a name, importing its
+    module if needed.
+
+    :param str name: Name of the formatter, e.g. 'markdown'.
+
+    Example usage: ::
+
+        Markdown = docify.get_formatter('markdown')
+        print(Markdown(doc))
+    '''
+    try:
+        return _loaded[name]
+    except KeyError:
+        pass
+    if name not in _registry:
+        _scan()
+    if name not in _registry:
+        raise KeyError('Unknown formatter {!r}, available: {}'.format(
+            name, ', '.join(names())))
+    formatter = _registry[name]
+    if isinstance(formatter, str):
+        module, _, attr = formatter.partition(':')
+        formatter = getattr(import_module(module), attr)
+    elif not isinstance(formatter, type):
+        formatter = formatter.load()
+    _loaded[name] = formatter
+    return formatter
+
+
+def names():
+    '''Returns the sorted names of the available formatters, including
+    those of entry points.
+    '''
+    _scan()
+    return sorted(_registry)
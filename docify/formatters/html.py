@@ -1,6 +1,5 @@
-import cgi
-
-from docify.lib.formatter import Formatter
+from docify.lib.escape import HTML_ESCAPER
+from docify.lib.formatter import Formatter, handles
 from docify import Document, components as c
 
 __all__ = [
@@ -29,154 +28,259 @@ DOC_TMPL = '''\
 class HTML(Formatter):
     '''HTML formatter to format document into plain HTML.'''
 
+    escaper = HTML_ESCAPER
+
     def __init__(self, *args, **kwargs):
         super(HTML, self).__init__(*args, **kwargs)
         self.tmpl = DOC_TMPL
         self.indent = 4
         self._spacing = 12
+        self._escaped = {}
 
-    def tag(self, tag, components=[], properties={}):
+    def template(self):
+        '''Returns the parts of the template before and after the body.'''
+        return self.tmpl.format('\0').split('\0')
+
+    def attrs(self, properties):
+        '''Returns the properties formatted as tag attributes.
+
+        :param dict properties: Properties of the component.
+        '''
         attrs = ''
         for k in properties:
             v = properties[k]
             attrs += ' {}="{}"'.format(k, v.replace('"', '\\"'))
+        return attrs
 
-        if len(components) == 0:
-            return '<{0}{1} />'.format(tag, attrs)
-
-        return '<{0}{1}>{2}</{0}>'.format(
-            tag, attrs, ''.join([self.f(c) for c in components]))
-
-    def update_handlers(self):
-        '''Overriding parent method'''
-
-        super(HTML, self).update_handlers()
-
-        @self.handles(Document)
-        def handle_doc(self, obj):
-            return self.tmpl.format(('\n' + (' ' * self._spacing)).join(
-                [self.f(c) for c in obj.components]))
-
-        @self.handles(c.Text)
-        def handle_text(self, obj):
-            return cgi.escape(obj.value)
-
-        @self.handles(c.Nbsp)
-        def handle_nbsp(self, obj):
-            return '&nbsp;'
-
-        @self.handles(c.Break)
-        def handle_br(self, obj):
-            return '<br />'
-
-        @self.handles(c.HorizontalRule)
-        def handle_hr(self, obj):
-            return '<hr />'
-
-        @self.handles(c.Anchor)
-        def handle_a(self, obj):
-            return self.tag('a', [obj.value], obj.props)
-
-        @self.handles(c.Image)
-        def handle_img(self, obj):
-            return self.tag('img', [], obj.props)
-
-        @self.handles(c.Header1)
-        def handle_h1(self, obj):
-            return self.tag('h1', obj.components, obj.props)
-
-        @self.handles(c.Header2)
-        def handle_h2(self, obj):
-            return self.tag('h2', obj.components, obj.props)
-
-        @self.handles(c.Header3)
-        def handle_h3(self, obj):
-            return self.tag('h3', obj.components, obj.props)
-
-        @self.handles(c.Header4)
-        def handle_h4(self, obj):
-            return self.tag('h4', obj.components, obj.props)
+    def element(self, tag, components=[], properties={}):
+        '''Yields the fragments of a tag wrapping given components.
 
-        @self.handles(c.Header5)
-        def handle_h5(self, obj):
-            return self.tag('h5', obj.components, obj.props)
-
-        @self.handles(c.Header6)
-        def handle_h6(self, obj):
-            return self.tag('h6', obj.components, obj.props)
-
-        @self.handles(c.Footer)
-        def handle_footer(self, obj):
-            return self.tag('footer', obj.components, obj.props)
-
-        @self.handles(c.Small)
-        def handle_small(self, obj):
-            return self.tag('small', obj.components, obj.props)
-
-        @self.handles(c.Cite)
-        def handle_cite(self, obj):
-            return self.tag('cite', obj.components, obj.props)
-
-        @self.handles(c.Italic)
-        def handle_i(self, obj):
-            return self.tag('i', obj.components, obj.props)
-
-        @self.handles(c.Bold)
-        def handle_b(self, obj):
-            return self.tag('b', obj.components, obj.props)
-
-        @self.handles(c.Blockquote)
-        def handle_blockquote(self, obj):
-            return self.tag('blockquote', obj.components, obj.props)
-
-        @self.handles(c.Pre)
-        def handle_pre(self, obj):
-            return self.tag('pre', obj.components, obj.props)
-
-        @self.handles(c.Code)
-        def handle_code(self, obj):
-            return self.tag('code', obj.components, obj.props)
-
-        @self.handles(c.Del)
-        def handle_del(self, obj):
-            return self.tag('del', obj.components, obj.props)
-
-        @self.handles(c.Section)
-        def handle_section(self, obj):
-            return self.tag('section', obj.components, obj.props)
-
-        @self.handles(c.Paragraph)
-        def handle_p(self, obj):
-            return self.tag('p', obj.components, obj.props)
-
-        @self.handles(c.Span)
-        def handle_span(self, obj):
-            return self.tag('span', obj.components, obj.props)
-
-        @self.handles(c.OrderedList)
-        def handle_ol(self, obj):
-            return self.tag('ol', obj.components, obj.props)
-
-        @self.handles(c.UnorderedList)
-        def handle_ul(self, obj):
-            return self.tag('ul', obj.components, obj.props)
-
-        @self.handles(c.ListItem)
-        def handle_li(self, obj):
-            return self.tag('li', obj.components, obj.props)
-
-        @self.handles(c.Table)
-        def handle_table(self, obj):
-            return self.tag('table', obj.components, obj.props)
-
-        @self.handles(c.TableHeader)
-        def handle_th(self, obj):
-            return self.tag('th', obj.components, obj.props)
+        :param str tag: Name of the tag.
+        :param list components: Components to wrap.
+        :param dict properties: Properties to set as attributes.
+        '''
+        attrs = self.attrs(properties) if properties else ''
+        if len(components) == 0:
+            yield '<{0}{1} />'.format(tag, attrs)
+            return
 
-        @self.handles(c.TableRow)
-        def handle_tr(self, obj):
-            return self.tag('tr', obj.components, obj.props)
+        yield '<' + tag + attrs + '>'
+        for c in components:
+            yield c
+        yield '</' + tag + '>'
 
-        @self.handles(c.TableData)
-        def handle_td(self, obj):
-            return self.tag('td', obj.components, obj.props)
+    def tag(self, tag, components=[], properties={}):
+        '''Same as element() but returns the formatted string.'''
+        return self.join(self.element(tag, components, properties))
+
+    def text(self, value):
+        '''Returns the string escaped for use as HTML text.
+
+        :param str value: String to escape.
+        '''
+        return self.escaper.escape(value)
+
+    def cells(self, row):
+        '''Returns the escaped texts of a table row whose cells hold a text
+        without properties, from the table escaped by :meth:`handle_table`,
+        or None if the row has other cells, if the cells or texts have
+        other handlers or with a RenderCache, which only caches parents
+        of cached cells, to format it component by component.
+
+        :param TableRow row: Row to format.
+        '''
+        escaped = self._escaped
+        if (not escaped or self.cache is not None or
+                self.handler(c.TableData) is not HTML.handle_td or
+                self.handler(c.Text) is not HTML.handle_text):
+            return None
+        cells = []
+        for x in row.components:
+            if (type(x) is not c.TableData or x._props or
+                    len(x.components) != 1 or type(x.components[0]) is not c.Text):
+                return None
+            value = escaped.pop(x.components[0], None)
+            if value is None:
+                return None
+            cells.append(value)
+        return cells
+
+    def row(self, tag, values):
+        '''Yields the fragments of a table row. Consecutive cells are
+        batched into a single fragment.
+
+        :param str tag: Name of the cell tag.
+        :param tuple values: Escaped strings and components of the cells.
+        '''
+        start, end = '<' + tag + '>', '</' + tag + '>'
+        buf = ['<tr>']
+        for v in values:
+            if isinstance(v, c._Component):
+                buf.append(start)
+                yield ''.join(buf)
+                yield v
+                buf = [end]
+            else:
+                buf.append(start + v + end)
+        buf.append('</tr>')
+        yield ''.join(buf)
+
+    @handles(Document)
+    def handle_doc(self, obj):
+        head, tail = self.template()
+        spacing = '\n' + (' ' * self._spacing)
+        yield head
+        for i, x in enumerate(self.expand(self.children(obj))):
+            if i > 0:
+                yield spacing
+            yield x
+        yield tail
+
+    @handles(c.Text)
+    def handle_text(self, obj):
+        value = self._escaped.pop(obj, None)
+        return self.text(obj.value) if value is None else value
+
+    @handles(c.Nbsp)
+    def handle_nbsp(self, obj):
+        return '&nbsp;'
+
+    @handles(c.Break)
+    def handle_br(self, obj):
+        return '<br />'
+
+    @handles(c.HorizontalRule)
+    def handle_hr(self, obj):
+        return '<hr />'
+
+    @handles(c.Anchor)
+    def handle_a(self, obj):
+        return self.element('a', [obj.value], obj.props)
+
+    @handles(c.Image)
+    def handle_img(self, obj):
+        return self.tag('img', [], obj.props)
+
+    @handles(c.Header1)
+    def handle_h1(self, obj):
+        return self.element('h1', obj.components, obj._props)
+
+    @handles(c.Header2)
+    def handle_h2(self, obj):
+        return self.element('h2', obj.components, obj._props)
+
+    @handles(c.Header3)
+    def handle_h3(self, obj):
+        return self.element('h3', obj.components, obj._props)
+
+    @handles(c.Header4)
+    def handle_h4(self, obj):
+        return self.element('h4', obj.components, obj._props)
+
+    @handles(c.Header5)
+    def handle_h5(self, obj):
+        return self.element('h5', obj.components, obj._props)
+
+    @handles(c.Header6)
+    def handle_h6(self, obj):
+        return self.element('h6', obj.components, obj._props)
+
+    @handles(c.Footer)
+    def handle_footer(self, obj):
+        return self.element('footer', obj.components, obj._props)
+
+    @handles(c.Small)
+    def handle_small(self, obj):
+        return self.element('small', obj.components, obj._props)
+
+    @handles(c.Cite)
+    def handle_cite(self, obj):
+        return self.element('cite', obj.components, obj._props)
+
+    @handles(c.Italic)
+    def handle_i(self, obj):
+        return self.element('i', obj.components, obj._props)
+
+    @handles(c.Bold)
+    def handle_b(self, obj):
+        return self.element('b', obj.components, obj._props)
+
+    @handles(c.Blockquote)
+    def handle_blockquote(self, obj):
+        return self.element('blockquote', obj.components, obj._props)
+
+    @handles(c.Pre)
+    def handle_pre(self, obj):
+        return self.element('pre', obj.components, obj._props)
+
+    @handles(c.Code)
+    def handle_code(self, obj):
+        return self.element('code', obj.components, obj._props)
+
+    @handles(c.Del)
+    def handle_del(self, obj):
+        return self.element('del', obj.components, obj._props)
+
+    @handles(c.Section)
+    def handle_section(self, obj):
+        return self.element('section', obj.components, obj._props)
+
+    @handles(c.Paragraph)
+    def handle_p(self, obj):
+        return self.element('p', obj.components, obj._props)
+
+    @handles(c.Span)
+    def handle_span(self, obj):
+        return self.element('span', obj.components, obj._props)
+
+    @handles(c.OrderedList)
+    def handle_ol(self, obj):
+        return self.element('ol', obj.components, obj._props)
+
+    @handles(c.UnorderedList)
+    def handle_ul(self, obj):
+        return self.element('ul', obj.components, obj._props)
+
+    @handles(c.ListItem)
+    def handle_li(self, obj):
+        return self.element('li', obj.components, obj._props)
+
+    @handles(c.Table)
+    def handle_table(self, obj):
+        # Cells are short and many, so they are escaped in one pass
+        self._escaped = self.escaper.subtree(obj)
+        return self.element('table', obj.components, obj._props)
+
+    @handles(c.ColumnarTable)
+    def handle_columnar_table(self, obj):
+        attrs = self.attrs(obj._props) if obj._props else ''
+        if not obj.headers and not len(obj):
+            yield '<table{} />'.format(attrs)
+            return
+
+        yield '<table' + attrs + '>'
+        if obj.headers:
+            for x in self.row('th', obj.header_cells(self.escaper.bulk)):
+                yield x
+        for values in obj.cells(escape=self.escaper.bulk):
+            for x in self.row('td', values):
+                yield x
+        yield '</table>'
+
+    @handles(c.TableHeader)
+    def handle_th(self, obj):
+        return self.element('th', obj.components, obj._props)
+
+    @handles(c.TableRow)
+    def handle_tr(self, obj):
+        cells = self.cells(obj)
+        if cells is None:
+            return self.element('tr', obj.components, obj._props)
+        attrs = self.attrs(obj._props) if obj._props else ''
+        if not cells:
+            return '<tr{} />'.format(attrs)
+        return '<tr{}><td>{}</td></tr>'.format(attrs, '</td><td>'.join(cells))
+
+    @handles(c.TableData)
+    def handle_td(self, obj):
+        return self.element('td', obj.components, obj._props)
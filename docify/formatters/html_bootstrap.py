@@ -1,7 +1,6 @@
-import cgi
-
 from docify import components as c
 from docify.formatters.html import HTML
+from docify.lib.formatter import handles
 
 __all__ = [
     'DOC_TMPL',
@@ -39,17 +38,12 @@ class HTMLBootstrap(HTML):
         super(HTMLBootstrap, self).__init__(*args, **kwargs)
         self.tmpl = DOC_TMPL
 
-    def update_handlers(self):
-        '''Overwriting parent's method'''
-
-        super(HTMLBootstrap, self).update_handlers()
-
-        @self.handles(c.Pre)
-        def handle_pre(self, obj):
-            return self.tag('pre', obj.components, {
-                'class': 'bg-light rounded'})
+    @handles(c.Pre)
+    def handle_pre(self, obj):
+        return self.element('pre', obj.components, {
+            'class': 'bg-light rounded'})
 
-        @self.handles(c.Code)
-        def handle_code(self, obj):
-            return self.tag('code', obj.components, {
-                'class': 'bg-light rounded'})
+    @handles(c.Code)
+    def handle_code(self, obj):
+        return self.element('code', obj.components, {
+            'class': 'bg-light rounded'})
@@ -1,6 +1,5 @@
-import re
-
-from docify.lib.formatter import Formatter
+from docify.lib.escape import MARKDOWN_ESCAPER
+from docify.lib.formatter import Formatter, handles
 from docify import Document, components as c
 
 __all__ = ['Markdown']
@@ -9,6 +8,8 @@ __all__ = ['Markdown']
 class Markdown(Formatter):
     '''Markdown formatter to format document into plain markdown.'''
 
+    escaper = MARKDOWN_ESCAPER
+
     def __init__(self, *args, **kwargs):
         super(Markdown, self).__init__(*args, **kwargs)
         self.newline_types = set([
@@ -17,6 +18,32 @@ class Markdown(Formatter):
             c.Header6, c.HorizontalRule, c.OrderedList, c.ListItem,
             c.Paragraph, c.Pre, c.Section, c.Table, c.UnorderedList
         ])
+        self._newlines = {}
+        self._escaped = {}
+
+    def isnewline(self, ctype):
+        '''Whether components of given type need their own line.
+        Subclasses of the newline types are treated alike.
+
+        :param type ctype: Type of component.
+        '''
+        try:
+            return self._newlines[ctype]
+        except KeyError:
+            found = any(t in self.newline_types for t in ctype.__mro__)
+            self._newlines[ctype] = found
+            return found
+
+    def gap(self, component):
+        '''Returns the line gap required after a component.
+
+        :param Component component: Component to render.
+        '''
+        if self.isnewline(type(component)):
+            return '\n'
+        if self.isnewline(type(self.sibling(component))):
+            return '\n'
+        return ''
 
     def r(self, txt, component):
         '''Helps rendering a formatted string with required line gaps.
@@ -24,171 +51,249 @@ class Markdown(Formatter):
         :param str txt: Formatted string.
         :param Component component: Component to render.
         '''
-        ctype = type(component)
-        ntype = type(component.next)
-        if ctype in self.newline_types:
-            txt += '\n'
-        elif ntype in self.newline_types:
-            txt += '\n'
-            # if ctype not in self.newline_types:
-            #     txt += '\n'
-        return txt
-
-    def update_handlers(self):
-        '''Overriding parent method'''
-
-        super(Markdown, self).update_handlers()
-
-        @self.handles(Document)
-        def handle_doc(self, obj):
-            return ''.join(map(lambda c: self.r(self.f(c), c), obj.components))
-
-        @self.handles(c.Text)
-        def handle_text(self, obj):
-            return self.r(
-                re.sub(r'((([_*]).+?\3[^_*]*)*)([_*])', r'\g<1>\\\\\g<4>', obj.value), obj)
-
-        @self.handles(c.Nbsp)
-        def handle_nbsp(self, obj):
-            return self.r(' ', obj)
-
-        @self.handles(c.Break)
-        def handle_br(self, obj):
-            return self.r('', obj)
-
-        @self.handles(c.HorizontalRule)
-        def handle_hr(self, obj):
-            return self.r('--------------------', obj)
-
-        @self.handles(c.Anchor)
-        def handle_a(self, obj):
-            return self.r('[{}]({})'.format(self.f(obj.value), obj.props['href']), obj)
-
-        @self.handles(c.Image)
-        def handle_img(self, obj):
-            return self.r('![{}]({})'.format(obj.props['alt'], obj.props['src']), obj)
-
-        @self.handles(
-            c.Footer, c.Small, c.Section, c.Paragraph, c.Span,
-            c.ListItem, c.TableData, c.Table)
-        def handle_default(self, obj):
-            return self.r(''.join(map(
-                lambda c: self.r(self.f(c), c), obj.components)), obj)
-
-        @self.handles(c.Header1)
-        def handle_h1(self, obj):
-            return self.r('{}\n==============='.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Header2)
-        def handle_h2(self, obj):
-            return self.r('{}\n---------------'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Header3)
-        def handle_h3(self, obj):
-            return self.r('### {}'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Header4)
-        def handle_h4(self, obj):
-            return self.r('#### {}'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Header5)
-        def handle_h5(self, obj):
-            return self.r('##### {}'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Header6)
-        def handle_h6(self, obj):
-            return self.r('###### {}'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Cite, c.Italic)
-        def handle_cite_i(self, obj):
-            return self.r('*{}*'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Bold, c.TableHeader)
-        def handle_b(self, obj):
-            return self.r('**{}**'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Blockquote)
-        def handle_blockquote(self, obj):
-            return self.r('> {}'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Pre)
-        def handle_pre(self, obj):
-            return self.r('```\n{}\n```'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.Code)
-        def handle_code(self, obj):
-            if type(obj.parent) != c.Pre:
-                return self.r('``{}``'.format(
-                    ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-                ), obj)
-            return self.r(''.join(map(
-                lambda c: self.r(self.f(c), c), obj.components)), obj)
-
-        @self.handles(c.Del)
-        def handle_del(self, obj):
-            return self.r('~~{}~~'.format(
-                ''.join(map(lambda c: self.r(self.f(c), c), obj.components)),
-            ), obj)
-
-        @self.handles(c.OrderedList)
-        def handle_ol(self, obj):
-            txt = ''
-            n, d = 0, 0
-            p = obj.parent
-            while isinstance(p, c._List):
-                d += 1
-                p = p.parent
-
-            for x in obj.components:
-                n += 1
-                if isinstance(x, c._List):
-                    txt += self.r(self.f(x), x)
-                    continue
-                txt += self.r('{}{}. {}'.format(
-                    ' ' * d * 3, n, self.f(x)), x)
-            return self.r(txt, obj)
-
-        @self.handles(c.UnorderedList)
-        def handle_ul(self, obj):
-            txt = ''
-            d = 0
-            p = obj.parent
-            while isinstance(p, c._List):
-                d += 1
-                p = p.parent
-            for x in obj.components:
-                if isinstance(x, c._List):
-                    txt += self.r(self.f(x), x)
-                    continue
-                txt += self.r('{}* {}'.format(
-                    ' ' * d * 3, self.f(x)), x)
-            return self.r(txt, obj)
-
-        @self.handles(c.TableRow)
-        def handle_tr(self, obj):
-            txt = ' | '.join(map(self.f, obj.components))
-            txt += '\n'
+        return txt + self.gap(component)
+
+    def each(self, components):
+        '''Yields the components, each followed by its line gap.
+        Lazy components are expanded into their children.
+
+        :param list components: Components to render.
+        '''
+        for x in self.expand(components):
+            yield x
+            gap = self.gap(x)
+            if gap:
+                yield gap
+
+    def text(self, value):
+        '''Returns the string escaped for use as markdown text.
+
+        :param str value: String to escape.
+        '''
+        return self.escaper.escape(value)
+
+    def cells(self, row):
+        '''Returns the escaped texts of a table row whose cells hold a text,
+        from the table escaped by :meth:`handle_table`, or None if the row
+        has other cells, if the cells or texts have other handlers or line
+        gaps or with a RenderCache, which only caches parents of cached
+        cells, to format it component by component.
+
+        :param TableRow row: Row to format.
+        '''
+        escaped = self._escaped
+        if (not escaped or self.cache is not None or
+                self.handler(c.TableData) is not Markdown.handle_default or
+                self.handler(c.Text) is not Markdown.handle_text or
+                self.isnewline(c.TableData) or self.isnewline(c.Text) or
+                self.isnewline(type(None))):
+            return None
+        cells = []
+        for x in row.components:
+            if (type(x) is not c.TableData or len(x.components) != 1 or
+                    type(x.components[0]) is not c.Text):
+                return None
+            value = escaped.pop(x.components[0], None)
+            if value is None:
+                return None
+            cells.append(value)
+        return cells
+
+    def row(self, values, mark='', first=False):
+        '''Yields the fragments of a table row. Consecutive cells are
+        batched into a single fragment.
+
+        :param tuple values: Escaped strings and components of the cells.
+        :param str mark: String to put around each cell.
+        :param bool first: Whether the row is followed by the separator line.
+        '''
+        buf = []
+        for i, v in enumerate(values):
+            if i > 0:
+                buf.append(' | ')
+            if isinstance(v, c._Component):
+                buf.append(mark)
+                yield ''.join(buf)
+                yield v
+                buf = [self.gap(v) + mark]
+            else:
+                buf.append(mark + v + mark)
+        buf.append('\n')
+        if first:
+            buf.append(' | '.join(['-' * 10] * len(values)) + '\n')
+        yield ''.join(buf)
+
+    def wrap(self, obj, before, after=''):
+        '''Yields the fragments of a component's children wrapped
+        between given strings, followed by the component's line gap.
+
+        :param Component obj: Component to render.
+        :param str before: String to put before the children.
+        :param str after: String to put after the children.
+        '''
+        if before:
+            yield before
+        for x in self.each(obj.components):
+            yield x
+        yield after + self.gap(obj)
+
+    @handles(Document)
+    def handle_doc(self, obj):
+        return self.each(self.children(obj))
+
+    @handles(c.Text)
+    def handle_text(self, obj):
+        value = self._escaped.pop(obj, None)
+        if value is None:
+            value = self.text(obj.value)
+        return self.r(value, obj)
+
+    @handles(c.Nbsp)
+    def handle_nbsp(self, obj):
+        return self.r(' ', obj)
+
+    @handles(c.Break)
+    def handle_br(self, obj):
+        return self.r('', obj)
+
+    @handles(c.HorizontalRule)
+    def handle_hr(self, obj):
+        return self.r('--------------------', obj)
+
+    @handles(c.Anchor)
+    def handle_a(self, obj):
+        yield '['
+        yield obj.value
+        yield ']({})'.format(obj.props['href']) + self.gap(obj)
+
+    @handles(c.Image)
+    def handle_img(self, obj):
+        return self.r('![{}]({})'.format(obj.props['alt'], obj.props['src']), obj)
+
+    @handles(
+        c.Footer, c.Small, c.Section, c.Paragraph, c.Span,
+        c.ListItem, c.TableData)
+    def handle_default(self, obj):
+        return self.wrap(obj, '')
+
+    @handles(c.Table)
+    def handle_table(self, obj):
+        # Cells are short and many, so they are escaped in one pass
+        self._escaped = self.escaper.subtree(obj)
+        return self.wrap(obj, '')
+
+    @handles(c.Header1)
+    def handle_h1(self, obj):
+        return self.wrap(obj, '', '\n===============')
+
+    @handles(c.Header2)
+    def handle_h2(self, obj):
+        return self.wrap(obj, '', '\n---------------')
+
+    @handles(c.Header3)
+    def handle_h3(self, obj):
+        return self.wrap(obj, '### ')
+
+    @handles(c.Header4)
+    def handle_h4(self, obj):
+        return self.wrap(obj, '#### ')
+
+    @handles(c.Header5)
+    def handle_h5(self, obj):
+        return self.wrap(obj, '##### ')
+
+    @handles(c.Header6)
+    def handle_h6(self, obj):
+        return self.wrap(obj, '###### ')
+
+    @handles(c.Cite, c.Italic)
+    def handle_cite_i(self, obj):
+        return self.wrap(obj, '*', '*')
+
+    @handles(c.Bold, c.TableHeader)
+    def handle_b(self, obj):
+        return self.wrap(obj, '**', '**')
+
+    @handles(c.Blockquote)
+    def handle_blockquote(self, obj):
+        return self.wrap(obj, '> ')
+
+    @handles(c.Pre)
+    def handle_pre(self, obj):
+        return self.wrap(obj, '```\n', '\n```')
+
+    @handles(c.Code)
+    def handle_code(self, obj):
+        if type(obj.parent) != c.Pre:
+            return self.wrap(obj, '``', '``')
+        return self.wrap(obj, '')
+
+    @handles(c.Del)
+    def handle_del(self, obj):
+        return self.wrap(obj, '~~', '~~')
+
+    @handles(c.OrderedList)
+    def handle_ol(self, obj):
+        n, d = 0, 0
+        p = obj.parent
+        while isinstance(p, c._List):
+            d += 1
+            p = p.parent
+
+        for x in self.expand(obj.components):
+            n += 1
+            if not isinstance(x, c._List):
+                yield '{}{}. '.format(' ' * d * 3, n)
+            yield x
+            yield self.gap(x)
+        yield self.gap(obj)
+
+    @handles(c.UnorderedList)
+    def handle_ul(self, obj):
+        d = 0
+        p = obj.parent
+        while isinstance(p, c._List):
+            d += 1
+            p = p.parent
+        for x in self.expand(obj.components):
+            if not isinstance(x, c._List):
+                yield '{}* '.format(' ' * d * 3)
+            yield x
+            yield self.gap(x)
+        yield self.gap(obj)
+
+    @handles(c.TableRow)
+    def handle_tr(self, obj):
+        cells = self.cells(obj)
+        if cells is not None:
+            txt = '\n'
             if obj.prev is None:
-                txt += ' | '.join(['-' * 10] * len(obj.components))
-                txt += '\n'
-            return self.r(txt, obj)
+                txt += ' | '.join(['-' * 10] * len(cells)) + '\n'
+            return ' | '.join(cells) + self.r(txt, obj)
+        return self._handle_tr(obj)
+
+    def _handle_tr(self, obj):
+        n = 0
+        for x in self.expand(obj.components):
+            if n > 0:
+                yield ' | '
+            yield x
+            n += 1
+        txt = '\n'
+        if obj.prev is None:
+            txt += ' | '.join(['-' * 10] * n)
+            txt += '\n'
+        yield self.r(txt, obj)
+
+    @handles(c.ColumnarTable)
+    def handle_columnar_table(self, obj):
+        first = True
+        if obj.headers:
+            for x in self.row(obj.header_cells(self.escaper.bulk), '**', first):
+                yield x
+            first = False
+        for values in obj.cells(escape=self.escaper.bulk):
+            for x in self.row(values, '', first):
+                yield x
+            first = False
+        yield self.gap(obj)
@@ -0,0 +1,30 @@
+import asyncio
+import inspect
+
+__all__ = ['render_async']
+
+
+async def render_async(formatter, writer, encoding='utf-8', size=8192):
+    '''Renders a formatter's document into an asyncio stream writer.
+    Yields to the event loop between chunks and waits on ``drain()``
+    so that the writer's backpressure is respected.
+
+    :param Formatter formatter: Formatter to render.
+    :param StreamWriter writer: Object with a ``write`` method, and
+        optionally a ``drain`` coroutine method. ``write`` may be a
+        coroutine method too.
+    :param str encoding: Encoding to write bytes with.
+        Use None to write strings. Default is 'utf-8'.
+    :param int size: Minimum length of the written chunks.
+        Default is 8192.
+    '''
+    drain = getattr(writer, 'drain', None)
+    for chunk in formatter.iter_render(size):
+        if encoding is not None:
+            chunk = chunk.encode(encoding)
+        result = writer.write(chunk)
+        if inspect.isawaitable(result):
+            await result
+        if drain is not None:
+            await drain()
+        await asyncio.sleep(0)
@@ -0,0 +1,207 @@
+'''Command line interface rendering documents into files, in one process.
+
+Usage: ::
+
+    python -m docify -f html -f markdown examples/*/doc.py
+    python -m docify -f html -o 'build/{name}{ext}' -j 4 reports/*.bin
+    python -m docify -f html --watch examples/*/doc.py
+
+An input is either a Python file defining a Document, by default in a
+variable named ``doc``, or a document written by
+:func:`docify.lib.serialize.dump`. Python files are run without
+``__name__ == '__main__'``, so they can be scripts too.
+'''
+import argparse
+import os
+import runpy
+import sys
+import time
+from functools import partial
+
+from docify.formatters import get_formatter
+from docify.lib.document import Document
+from docify.lib.profiling import timer
+
+__all__ = ['EXTENSIONS', 'load', 'render', 'main']
+
+#: File extension of the formats whose extension isn't '.' + their name.
+#: Formats are the names of :func:`docify.get_formatter`, and 'raw', the
+#: representation of the document.
+EXTENSIONS = {
+    'htmlbootstrap': '.withbootstrap.html',
+    'markdown': '.md',
+    'raw': '.raw.txt',
+}
+
+
+def load(path, name='doc'):
+    '''Loads the document of an input file.
+
+    :param str path: Python file or serialized document.
+    :param str name: Variable holding the document in Python files.
+        Default is 'doc'.
+    '''
+    from docify.lib import serialize
+    with open(path, 'rb') as f:
+        if f.read(len(serialize.MAGIC)) == serialize.MAGIC:
+            f.seek(0)
+            return serialize.load(f)
+    doc = runpy.run_path(path, run_name='__docify__').get(name)
+    if not isinstance(doc, Document):
+        raise ValueError('{} defines no Document named {}'.format(path, name))
+    return doc
+
+
+def _write(path, text):
+    '''Writes a file unless it already holds the text. Returns whether it
+    was written.
+    '''
+    data = text.encode('utf-8')
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except EnvironmentError:
+        pass
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def render(path, formats, output='{dir}/{name}{ext}', name='doc', cite=True):
+    '''Renders an input file into a file per format. Outputs end with a
+    newline, and files already holding the output are left untouched.
+    Returns ``(format, output path, seconds, written)`` for each format,
+    the time to load the input being reported with format 'load'.
+
+    :param str path: Python file or serialized document.
+    :param list formats: Names of formats, see EXTENSIONS.
+    :param str output: Path of the outputs, formatted with the directory
+        and the name of the input without extension, and the name and
+        file extension of the format. Default is '{dir}/{name}{ext}'.
+    :param str name: Variable holding the document in Python files.
+    :param bool cite: Whether to add the grumpy citation. Default is True.
+    '''
+    start = timer()
+    doc = load(path, name)
+    results = [('load', path, timer() - start, False)]
+    fields = {'dir': os.path.dirname(path) or '.',
+              'name': os.path.splitext(os.path.basename(path))[0]}
+    for fmt in formats:
+        ext = EXTENSIONS.get(fmt, '.' + fmt)
+        start = timer()
+        if fmt == 'raw':
+            text = str(doc)
+        else:
+            text = get_formatter(fmt)(doc, cite=cite, copy=False).render()
+        target = output.format(format=fmt, ext=ext, **fields)
+        written = _write(target, text + '\n')
+        results.append((fmt, target, timer() - start, written))
+    return results
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except EnvironmentError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+def _run(paths, job, executor, log):
+    '''Renders the inputs, in the executor if any, and logs the timings.
+    Returns the number of inputs which failed.
+    '''
+    jobs = [(path, executor.submit(job, path) if executor else None)
+            for path in paths]
+    failed = 0
+    for path, future in jobs:
+        try:
+            results = future.result() if future else job(path)
+        except Exception as e:
+            log.write('{}: error: {}\n'.format(path, e))
+            failed += 1
+            continue
+        for fmt, target, seconds, written in results:
+            status = 'written' if written else 'unchanged'
+            if fmt == 'load':
+                status = ''
+            log.write('{:<14}{:>10.2f} ms  {} {}\n'.format(
+                fmt, seconds * 1e3, target, status).rstrip() + '\n')
+    log.flush()
+    return failed
+
+
+def main(argv=None, log=None):
+    '''Entry point of ``python -m docify``. Returns the exit status, 1 if
+    an input failed to render on the first run, including when watch mode
+    is stopped with Ctrl-C, or 0.
+
+    :param list argv: Arguments. Default is sys.argv[1:].
+    :param file log: Where to report timings and errors. Default is
+        sys.stderr.
+    '''
+    log = log or sys.stderr
+    parser = argparse.ArgumentParser(
+        prog='python -m docify',
+        description='Render documents into files in a single process.')
+    parser.add_argument('inputs', nargs='+', metavar='input',
+                        help='Python file defining a Document, or serialized document')
+    parser.add_argument('-f', '--format', action='append',
+                        help='format to render, html, htmlbootstrap, markdown, raw '
+                             'or a registered formatter, can be repeated, default is html')
+    parser.add_argument('-o', '--output', default='{dir}/{name}{ext}',
+                        help='path of the outputs, with the fields {dir}, {name}, '
+                             '{format} and {ext}, default is %(default)s')
+    parser.add_argument('-n', '--name', default='doc',
+                        help='variable holding the document, default is %(default)s')
+    parser.add_argument('--no-cite', dest='cite', action='store_false',
+                        help="don't add the grumpy citation")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of worker processes, default is %(default)s')
+    parser.add_argument('-w', '--watch', action='store_true',
+                        help='render the inputs again when they change')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='seconds between checks in watch mode, default is %(default)s')
+    args = parser.parse_args(argv)
+
+    formats = args.format or ['html']
+    for fmt in formats:
+        if fmt != 'raw':
+            try:
+                get_formatter(fmt)
+            except KeyError as e:
+                parser.error(e.args[0])
+    job = partial(render, formats=formats, output=args.output,
+                  name=args.name, cite=args.cite)
+    executor = None
+    if args.jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(args.jobs)
+    failed = 0
+    try:
+        stamps = dict((path, _stamp(path)) for path in args.inputs)
+        start = timer()
+        failed = _run(args.inputs, job, executor, log)
+        log.write('{} inputs in {:.2f} s\n'.format(
+            len(args.inputs), timer() - start))
+        while args.watch:
+            time.sleep(args.interval)
+            changed = []
+            for path in args.inputs:
+                stamp = _stamp(path)
+                if stamp != stamps[path]:
+                    stamps[path] = stamp
+                    if stamp is not None:
+                        changed.append(path)
+            _run(changed, job, executor, log)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return 1 if failed else 0
@@ -1,9 +1,12 @@
-from copy import deepcopy
+import sys
 
 __all__ = [
+    'compact',
     '_Component',
     '_Leaf',
     'Text',
+    'Slot',
+    'Lazy',
     '_Symbol',
     'NoBreakSpace',
     'Break',
@@ -34,6 +37,7 @@ __all__ = [
     'OrderedList',
     'ListItem',
     'Table',
+    'ColumnarTable',
     'TableHeader',
     'TableRow',
     'TableData',
@@ -62,9 +66,39 @@ __all__ = [
 ]
 
 
+try:
+    _intern = sys.intern
+except AttributeError:
+    _intern = intern
+
+_compact = False
+
+
+class compact(object):
+    '''Context manager for a memory-saving construction mode.
+    The values of Text built inside it are interned so that repeated
+    strings are stored once. The mode is process-wide.
+
+    Example usage: ::
+
+        with compact():
+            table = Table(*[Tr(Td('OK'), Td('-')) for _ in range(10000)])
+    '''
+
+    def __enter__(self):
+        global _compact
+        self.previous, _compact = _compact, True
+
+    def __exit__(self, *exc):
+        global _compact
+        _compact = self.previous
+
+
 class _Component(object):
     '''An abstract class for any component. Do not use this class directly.
     Supports ``+`` operator to return a group of components wrapped inside Span.
+    ``+=`` extends a Span in place, and ``Span.join`` builds one from many
+    components; unlike chained ``+``, neither copies the Span.
 
     :param dict properties: Extra properties for the component.
 
@@ -78,23 +112,53 @@ class _Component(object):
 
         Span('Some text') + Nbsp() + Span('Some other text')
         # Result: Span('Some text', Nbsp(), 'Some other text')
+
+        span = Span()
+        for word in words:
+            span += Nbsp() + word
     '''
 
+    __slots__ = ('_props', 'parent', 'prev', 'next', '_rendered')
+
     def __init__(self, **properties):
-        self.props = properties
+        self._props = properties or None
         self.parent = None
-        self.depth = 0
         self.prev = None
         self.next = None
+        self._rendered = None
+
+    @property
+    def props(self):
+        '''Extra properties of the component.
+        The dict is only allocated when properties are given or accessed.
+        '''
+        if self._props is None:
+            self._props = {}
+        return self._props
+
+    @props.setter
+    def props(self, properties):
+        self._props = properties
+
+    @property
+    def depth(self):
+        '''Nesting depth of the component. It is computed on demand from
+        the ancestors, so attaching a subtree doesn't need to update it.
+        '''
+        d, p = 0, self.parent
+        while isinstance(p, _Component):
+            d += 1
+            p = p.parent
+        if p is not None:
+            d += p.depth + 1
+        return d
 
     def setparent(self, parent):
         '''Set the parent object.
-        Also updates it's depth based on parent's depth.
 
         :param Component|Document parent: Parent to set.
         '''
         self.parent = parent
-        self.setdepth(parent.depth + 1)
 
     def setnext(self, nxt):
         '''Add reference to previous and next element to support
@@ -106,14 +170,22 @@ class _Component(object):
         nxt.prev = self
 
     def setdepth(self, depth):
-        '''Set depth of current component.
+        '''Does nothing. Kept for compatibility, as the depth is now
+        computed from the ancestors.
 
         :param int depth: depth to set.
         '''
-        self.depth = depth
+        pass
+
+    def __getstate__(self):
+        return _getstate(self)
+
+    def __setstate__(self, state):
+        _setstate(self, state)
 
     def __add__(self, component):
         if isinstance(self, Span):
+            from copy import deepcopy
             span = deepcopy(self)
         else:
             span = Span()
@@ -121,17 +193,19 @@ class _Component(object):
                 span.setparent(self.parent)
             span.add(self)
 
-        if not isinstance(component, Span):
-            span.add(component)
-        else:
-            for c in component.components:
-                span.add(c)
+        span.extend((component,))
         return span
 
+    def __iadd__(self, component):
+        if not isinstance(self, Span):
+            return self + component
+        self.extend((component,))
+        return self
+
 
 class _Leaf(_Component):
     '''An abstract class for leaf components'''
-    pass
+    __slots__ = ()
 
 
 class Text(_Leaf):
@@ -146,34 +220,170 @@ class Text(_Leaf):
         # Becomes: Document(Text('Some text'), Text('Some other text'))
     '''
 
+    __slots__ = ('value',)
+
     def __init__(self, value):
         super(Text, self).__init__()
-        self.value = str(value)
+        self.value = _intern(str(value)) if _compact else str(value)
 
     def __repr__(self):
         return '{}({})'.format(self.__class__.__name__, self.value.__repr__())
 
 
+class Slot(Text):
+    '''Placeholder for a value given when rendering a compiled template,
+    see :func:`docify.lib.template.compile`. The value is formatted like
+    Text in place of the slot.
+
+    :param str name: Name of the value.
+
+    Example usage: ::
+
+        P('Dear ', Slot('name'), ',')
+    '''
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        super(Slot, self).__init__('')
+        self.name = name
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.name.__repr__())
+
+
+_end = object()
+
+
+class _Once(object):
+    '''Wraps an iterator so that iterating it a second time fails
+    instead of silently producing nothing.
+    '''
+
+    __slots__ = ('iterator', 'used')
+
+    def __init__(self, iterator):
+        self.iterator = iterator
+        self.used = False
+
+    def __iter__(self):
+        if self.used:
+            raise RuntimeError(
+                'Lazy children were already consumed. Pass a list or a '
+                'function returning an iterable to render them again.')
+        self.used = True
+        return self.iterator
+
+
+class Lazy(_Component):
+    '''Children produced only while formatting, one at a time. They are
+    linked to the parent of Lazy and its siblings as if they were added
+    in its place, then discarded, so the parent never holds them all.
+    Other objects are wrapped like with ``add()`` of the parent.
+
+    A list or any other iterable is iterated again on each render and a
+    function is called on each render to return a new iterable. An
+    iterator or generator can only be rendered once and rendering it
+    again raises RuntimeError. The parent of Lazy is never kept by a
+    RenderCache, and formatters sharing a document with ``copy=False``
+    each iterate the source.
+
+    :param iterable|callable source: Iterable of components or function
+        returning one.
+
+    Example usage: ::
+
+        Ul(Lazy(Li(row[0]) for row in cursor))
+        Table(Tr(Th('id'), Th('name')), Lazy(lambda: rows(db)))
+    '''
+
+    __slots__ = ('source', '_head')
+
+    def __init__(self, source):
+        super(Lazy, self).__init__()
+        if not callable(source) and iter(source) is source:
+            source = _Once(source)
+        self.source = source
+        self._head = None
+
+    def _open(self):
+        source = self.source() if callable(self.source) else self.source
+        return iter(source)
+
+    def _wrap(self, item):
+        if item is _end or isinstance(item, _Component):
+            return item
+        if isinstance(self.parent, _Component):
+            return Text(item)
+        return Span(item)
+
+    def peek(self):
+        '''Returns the first child without consuming it, or None if there
+        are no children. Starts a pass over the source.
+        '''
+        if self._head is None:
+            it = self._open()
+            self._head = (it, self._wrap(next(it, _end)))
+        head = self._head[1]
+        return None if head is _end else head
+
+    def items(self):
+        '''Yields the children, linked to the parent of Lazy. The link
+        from each child to the previous one is dropped once the next one
+        is requested.
+        '''
+        if self._head is not None:
+            (it, x), self._head = self._head, None
+        else:
+            it = self._open()
+            x = self._wrap(next(it, _end))
+        prev = self.prev
+        while x is not _end:
+            nxt = self._wrap(next(it, _end))
+            x.parent, x.prev = self.parent, prev
+            x.next = self.next if nxt is _end else nxt
+            yield x
+            x.prev = None
+            prev, x = x, nxt
+
+    def __deepcopy__(self, memo):
+        from copy import deepcopy
+        state = _getstate(self)
+        source = state.pop('source')
+        state.pop('_head', None)
+        copied = type(self).__new__(type(self))
+        memo[id(self)] = copied
+        _setstate(copied, deepcopy(state, memo))
+        copied.source = source
+        copied._head = None
+        return copied
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.source.__repr__())
+
+
 class _Symbol(_Leaf):
     '''An abstract class for all primitive symbols. Do not use it directly.'''
 
+    __slots__ = ()
+
     def __repr__(self):
         return '{}()'.format(self.__class__.__name__)
 
 
 class NoBreakSpace(_Symbol):
     '''NoBreakSpace. Similar to &nbsp;'''
-    pass
+    __slots__ = ()
 
 
 class Break(_Symbol):
     '''Break. Similar to <br />'''
-    pass
+    __slots__ = ()
 
 
 class HorizontalRule(_Symbol):
     '''HorizontalRule. Similar to <hr />'''
-    pass
+    __slots__ = ()
 
 
 class Anchor(_Leaf):
@@ -187,6 +397,8 @@ class Anchor(_Leaf):
         Anchor('Some link', href='https://some.link.com')
     '''
 
+    __slots__ = ('value',)
+
     def __init__(self, value, href, **kwargs):
         super(Anchor, self).__init__(href=href, **kwargs)
         self.value = value
@@ -208,6 +420,8 @@ class Image(_Leaf):
         Image(src='https://some.source.com/someimage.png', alt='Some text')
     '''
 
+    __slots__ = ()
+
     def __init__(self, src, alt, **kwargs):
         super(Image, self).__init__(src=src, alt=alt, **kwargs)
 
@@ -223,6 +437,8 @@ class _Composite(_Component):
     :param list components: Components to add.
     '''
 
+    __slots__ = ('components',)
+
     def __init__(self, *components, **kwargs):
         super(_Composite, self).__init__(**kwargs)
         self.components = []
@@ -236,104 +452,181 @@ class _Composite(_Component):
         '''
         if not isinstance(component, _Component):
             component = Text(component)
+        if component.parent is not None:
+            _forget(component)
         component.setparent(self)
 
         if len(self.components) > 0:
             self.components[-1].setnext(component)
+            _invalidate(self.components[-1])
 
         self.components.append(component)
+        _invalidate(self)
 
-    def setdepth(self, depth):
-        '''Overwriting setdepth method.'''
+    def __repr__(self):
+        return _repr(self)
 
-        self.depth = depth
-        for c in self.components:
-            c.setdepth(self.depth + 1)
 
-    def __repr__(self):
-        return '{}(\n{}{})'.format(
-            self.__class__.__name__, ' ' * (self.depth + 1) * 4,
-            ('\n' + (' ' * (self.depth + 1) * 4)).join(map(str, self.components)))
+def _getstate(obj):
+    '''Returns the state of a slotted object for copying and pickling,
+    leaving out the output cached by formatters.
+
+    :param Component|Document obj: Object to get the state of.
+    '''
+    state = {}
+    for klass in type(obj).__mro__:
+        for k in getattr(klass, '__slots__', ()):
+            if k != '_rendered' and hasattr(obj, k):
+                state[k] = getattr(obj, k)
+    state.update(getattr(obj, '__dict__', {}))
+    return state
+
+
+def _setstate(obj, state):
+    '''Restores the state of a slotted object.
+
+    :param Component|Document obj: Object to restore.
+    :param dict state: State returned by _getstate().
+    '''
+    obj._rendered = None
+    for k, v in state.items():
+        setattr(obj, k, v)
+
+
+def _invalidate(node):
+    '''Drops the output cached by formatters for a node and its ancestors.
+    Stops at the first node without cached output, as its ancestors
+    can't have any either.
+
+    :param Component|Document node: Node that changed.
+    '''
+    while node is not None and node._rendered:
+        for cache in list(node._rendered):
+            cache.discard(node)
+        node = getattr(node, 'parent', None)
+
+
+def _forget(node):
+    '''Drops the output cached by formatters for a whole subtree and the
+    ancestors of its current parent. Used when a component is moved, as
+    its output may depend on its ancestors.
+
+    :param Component node: Root of the subtree.
+    '''
+    _invalidate(node.parent)
+    stack = [node]
+    while stack:
+        x = stack.pop()
+        if x._rendered:
+            for cache in list(x._rendered):
+                cache.discard(x)
+        stack.extend(getattr(x, 'components', ()))
+
+
+def _repr(obj):
+    '''Represents a composite object or document. Walks the subtree
+    iteratively to support any nesting depth.
+
+    :param Component|Document obj: Object to represent.
+    '''
+    chunks = []
+    stack = [(obj, obj.depth)]
+    while stack:
+        x, depth = stack.pop()
+        if isinstance(x, str):
+            chunks.append(x)
+            continue
+        if x is not obj and type(x).__repr__ is not _Composite.__repr__:
+            chunks.append(str(x))
+            continue
+        spacing = '\n' + (' ' * (depth + 1) * 4)
+        chunks.append(x.__class__.__name__ + '(' + spacing)
+        stack.append((')', depth))
+        for i in range(len(x.components) - 1, -1, -1):
+            stack.append((x.components[i], depth + 1))
+            if i > 0:
+                stack.append((spacing, depth))
+    return ''.join(chunks)
 
 
 class _Header(_Composite):
     '''Header, Do not use it directly. It's supposed to be an abstract class'''
-    pass
+    __slots__ = ()
 
 
 class Header1(_Header):
     '''Header1. Similar to <h1></h1>'''
-    pass
+    __slots__ = ()
 
 
 class Header2(_Header):
     '''Header2. Similar to <h2></h2>'''
-    pass
+    __slots__ = ()
 
 
 class Header3(_Header):
     '''Header3. Similar to <h3></h3>'''
-    pass
+    __slots__ = ()
 
 
 class Header4(_Header):
     '''Header4. Similar to <h4></h4>'''
-    pass
+    __slots__ = ()
 
 
 class Header5(_Header):
     '''Header5. Similar to <h5></h5>'''
-    pass
+    __slots__ = ()
 
 
 class Header6(_Header):
     '''Header6. Similar to <h6></h6>'''
-    pass
+    __slots__ = ()
 
 
 class Footer(_Composite):
     '''Footer. Similar to <footer></footer>'''
-    pass
+    __slots__ = ()
 
 
 class Small(_Composite):
     '''Small. Similar to <small></small>'''
-    pass
+    __slots__ = ()
 
 
 class Cite(_Composite):
     '''Cite. Similar to <cite></cite>'''
-    pass
+    __slots__ = ()
 
 
 class Italic(_Composite):
     '''Italic. Similar to <i></i>'''
-    pass
+    __slots__ = ()
 
 
 class Bold(_Composite):
     '''Bold. Similar to <b></b>'''
-    pass
+    __slots__ = ()
 
 
 class Blockquote(_Composite):
     '''Blockquote. Similar to <blockquote></blockquote>'''
-    pass
+    __slots__ = ()
 
 
 class Pre(_Composite):
     '''Pre. Similar to <pre></pre>'''
-    pass
+    __slots__ = ()
 
 
 class Code(_Composite):
     '''Code. Similar to <code></code>'''
-    pass
+    __slots__ = ()
 
 
 class Del(_Composite):
     '''Del. Similar to <del></del>'''
-    pass
+    __slots__ = ()
 
 
 class Section(_Composite):
@@ -345,7 +638,7 @@ class Section(_Composite):
             I('Some text'),
             B('Some other text'))
     '''
-    pass
+    __slots__ = ()
 
 
 class Paragraph(_Composite):
@@ -358,7 +651,7 @@ class Paragraph(_Composite):
             Nbsp(),
             B('Some other text'))
     '''
-    pass
+    __slots__ = ()
 
 
 class Span(_Composite):
@@ -368,14 +661,43 @@ class Span(_Composite):
 
         Span('Some text', 'Some other text')
     '''
-    pass
+    __slots__ = ()
+
+    @classmethod
+    def join(cls, components):
+        '''Builds a Span from many components in linear time.
+        Spans among them are flattened, like with the ``+`` operator.
+
+        :param iterable components: Components to join.
+
+        Example usage: ::
+
+            Span.join([I('Some text'), Nbsp(), Span('Some other', 'text')])
+            # Result: Span(I('Some text'), Nbsp(), 'Some other', 'text')
+        '''
+        span = cls()
+        span.extend(components)
+        return span
+
+    def extend(self, components):
+        '''Add components as children. The children of Spans among them are
+        added instead of the Spans themselves.
+
+        :param iterable components: Components to add.
+        '''
+        for component in components:
+            if isinstance(component, Span):
+                for c in list(component.components):
+                    self.add(c)
+            else:
+                self.add(component)
 
 
 class _List(_Composite):
     '''Abstract class for ordered and unordered list.
     Do not use it directly.
     '''
-    pass
+    __slots__ = ()
 
 
 class OrderedList(_List):
@@ -389,7 +711,7 @@ class OrderedList(_List):
             Ll(
                 Li('item 2.1')))
     '''
-    pass
+    __slots__ = ()
 
 
 class UnorderedList(_List):
@@ -403,14 +725,14 @@ class UnorderedList(_List):
             Ul(
                 Li('item 2.1')))
     '''
-    pass
+    __slots__ = ()
 
 
 class ListItem(_Composite):
     '''ListItem. Similar to <li></li>.
     It should be used inside OrderedList and UnorderedList only.
     '''
-    pass
+    __slots__ = ()
 
 
 class Table(_Composite):
@@ -425,23 +747,192 @@ class Table(_Composite):
             Tr(
                 Td('value 1'),
                 Td('value 2')))
+
+    Large tables can keep their cells in columns instead: ::
+
+        Table.from_columns(['header 1', 'header 2'], [[1, 2], [3, 4]])
+        Table.from_rows(['header 1', 'header 2'], [(1, 3), (2, 4)])
+    '''
+    __slots__ = ()
+
+    @classmethod
+    def from_columns(cls, headers, columns, **kwargs):
+        '''Builds a ColumnarTable from columns of cell values.
+
+        See ColumnarTable for the keyword arguments.
+
+        :param list headers: Header of each column, or None.
+        :param list columns: Sequence of cell values for each column.
+        '''
+        return ColumnarTable(headers, columns, **kwargs)
+
+    @classmethod
+    def from_rows(cls, headers, rows, **kwargs):
+        '''Builds a ColumnarTable from rows of cell values.
+
+        A 2-D NumPy array is split into column views without copying.
+
+        :param list headers: Header of each column, or None.
+        :param iterable rows: Sequence of cell values for each row.
+        '''
+        if hasattr(rows, 'T'):
+            return ColumnarTable(headers, list(rows.T), **kwargs)
+        return ColumnarTable(headers, [list(x) for x in zip(*rows)], **kwargs)
+
+
+class ColumnarTable(Table):
+    '''Table keeping its cells as plain values in column arrays, without
+    any TableRow, TableData or Text objects. Formatters render it row by
+    row to the same output as the equivalent hand-built Table.
+    Use Table.from_columns() or Table.from_rows() to build one.
+
+    A column can be any sequence, including NumPy arrays and other arrays
+    with a ``tolist`` method, which are converted in bulk. Cells are
+    formatted column by column in batches of rows, with ``format()`` and
+    the column's format spec, or converted to string like Text does when
+    the column has none. A component in a column without format spec is
+    formatted as the only child of the cell.
+
+    :param list headers: Header of each column, or None.
+    :param list columns: Sequence of cell values for each column.
+    :param list|dict formats: Format spec of each column, e.g. ',.2f'.
+        A dict maps column indexes or headers to format specs.
+    :param str nan: Placeholder for NaN and None cells. Default is None,
+        to format them like other values.
+
+    Example usage: ::
+
+        Table.from_columns(
+            ['name', 'price'], [names, prices],
+            formats={'price': ',.2f'}, nan='-')
+    '''
+    __slots__ = ('headers', 'columns', 'formats', 'nan')
+
+    def __init__(self, headers, columns, formats=None, nan=None, **kwargs):
+        super(ColumnarTable, self).__init__(**kwargs)
+        self.headers = list(headers) if headers else None
+        self.columns = list(columns)
+        if self.headers and len(self.headers) != len(self.columns):
+            raise ValueError('expected {} columns, got {}'.format(
+                len(self.headers), len(self.columns)))
+        if len(set(len(x) for x in self.columns)) > 1:
+            raise ValueError('columns have different lengths')
+
+        if isinstance(formats, dict):
+            names = self.headers or []
+            formats = [formats.get(i, formats.get(names[i]) if names else None)
+                       for i in range(len(self.columns))]
+        self.formats = list(formats or [None] * len(self.columns))
+        self.nan = nan
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def rows(self):
+        '''Yields the cell values of each row as a tuple.'''
+        return zip(*self.columns)
+
+    def header_cells(self, escape=None):
+        '''Returns the headers as a list of strings and components.
+
+        :param callable escape: Function escaping a list of strings,
+            leaving components as they are. Default is None.
+        '''
+        cells = [x if isinstance(x, _Component) else str(x)
+                 for x in self.headers or ()]
+        return escape(cells) if escape is not None else cells
+
+    def cells(self, size=4096, escape=None):
+        '''Yields the formatted cells of each row as a tuple of strings,
+        and components. Columns are formatted in batches of rows.
+
+        :param int size: Number of rows per batch. Default is 4096.
+        :param callable escape: Function escaping a batch of a column,
+            see header_cells(). Default is None.
+        '''
+        for start in range(0, len(self), size):
+            batch = [_format_column(x[start:start + size], f, self.nan)
+                     for x, f in zip(self.columns, self.formats)]
+            if escape is not None:
+                batch = [escape(x) for x in batch]
+            for row in zip(*batch):
+                yield row
+
+    def to_table(self):
+        '''Returns the equivalent Table built from TableRow components.'''
+        table = Table(**dict(self._props or {}))
+        if self.headers:
+            table.add(TableRow(*[TableHeader(x) for x in self.headers]))
+        for row in self.cells():
+            table.add(TableRow(*[TableData(x) for x in row]))
+        return table
+
+    def __repr__(self):
+        return '{}(headers={}, rows={})'.format(
+            self.__class__.__name__, self.headers.__repr__(), len(self))
+
+
+def _format_column(values, spec=None, nan=None):
+    '''Returns a batch of column values formatted as strings, leaving
+    components as they are. NumPy is only used if the values are a NumPy
+    array, to find NaN values; the strings are the same without it.
+
+    :param sequence values: Values to format.
+    :param str spec: Format spec. Default is None, to use str().
+    :param str nan: Placeholder for NaN and None values. Default is None.
     '''
-    pass
+    missing = None
+    if type(values).__module__ == 'numpy':
+        kind = values.dtype.kind
+        if kind in 'biuf':
+            missing = []
+            if nan is not None and kind == 'f':
+                import numpy
+                missing = numpy.flatnonzero(numpy.isnan(values)).tolist()
+        # Python ints and floats format like NumPy ints and float64, but
+        # not like other floats, e.g. float32 0.1, or dates
+        if kind in 'biu' or values.dtype == 'float64':
+            values = values.tolist()
+        else:
+            values = list(values)
+    elif hasattr(values, 'tolist'):
+        values = values.tolist()
+
+    if spec is None:
+        if missing is None:
+            fmt = lambda v: v if isinstance(v, _Component) else str(v)
+        else:
+            fmt = str
+    elif (spec[:1] == '.' and spec[-1:] == 'f' and spec[1:-1].isdigit() and
+          set(map(type, values)) <= set((int, float, bool))):
+        # Same as format() for Python numbers, but faster
+        fmt = ('%' + spec).__mod__
+    else:
+        fmt = lambda v: format(v, spec)
+
+    if nan is None:
+        return list(map(fmt, values))
+    if missing is None:
+        return [nan if v is None or v != v else fmt(v) for v in values]
+    output = list(map(fmt, values))
+    for i in missing:
+        output[i] = nan
+    return output
 
 
 class TableHeader(_Composite):
     '''TableHeader. Similar to <thead></thead>'''
-    pass
+    __slots__ = ()
 
 
 class TableRow(_Composite):
     '''TableRow. Similar to <tr></tr>'''
-    pass
+    __slots__ = ()
 
 
 class TableData(_Composite):
     '''TableData. Similar to <td></td>'''
-    pass
+    __slots__ = ()
 
 
 # Aliases
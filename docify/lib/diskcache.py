@@ -0,0 +1,419 @@
+import hashlib
+import io
+import os
+import tempfile
+import time
+from operator import attrgetter
+
+import docify
+from docify import components as c
+from docify.lib.escape import Escaper
+
+__all__ = ['DiskCache']
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+# Names of the attributes describing the structure of a component
+_links = frozenset(('parent', 'prev', 'next', 'components', '_rendered'))
+_plans = {}
+# Identifiers of the class handlers of each formatter class
+_classes = {}
+
+
+def _name(cls):
+    return '{}:{}'.format(cls.__module__, cls.__name__)
+
+
+def _setting(value):
+    '''Returns a string describing a setting of a formatter, or None if
+    it isn't a plain value, a set of classes or an escaper.
+    '''
+    if isinstance(value, (str, int, float)):
+        return repr(value)
+    if isinstance(value, (set, frozenset, list, tuple)) and all(
+            isinstance(x, type) for x in value):
+        return repr(sorted(_name(x) for x in value))
+    if isinstance(value, Escaper):
+        return repr((value.chars, value.table, value.pattern, value.repl))
+    return None
+
+
+def _settings(formatter):
+    '''Returns strings describing the public settings of a formatter, e.g.
+    its template or escaper, whether they are set on the instance or on
+    its class.
+    '''
+    attrs = {}
+    for klass in reversed(type(formatter).__mro__):
+        attrs.update(vars(klass))
+    attrs.update(vars(formatter))
+    result = []
+    for k, v in sorted(attrs.items()):
+        if k.startswith('_') or k in ('doc', 'trailer', 'handlers'):
+            continue
+        v = _setting(v)
+        if v is not None:
+            result.append('{}={}'.format(k, v))
+    return result
+
+
+def _value(value):
+    '''Returns a string describing a value a handler depends on, through
+    its defaults or closure, or None if it can't be described.
+    '''
+    if value is None or isinstance(value, (bool, str, int, float)):
+        return repr(value)
+    if isinstance(value, type):
+        return _name(value)
+    if isinstance(value, tuple):
+        values = [_value(x) for x in value]
+        return None if None in values else '({})'.format(','.join(values))
+    return _code(value)
+
+
+def _code(func):
+    '''Returns a string identifying the code of a handler: the bytecode,
+    constants and names of its code and nested code, and the values of its
+    defaults and closure. Returns None for callables without code, e.g.
+    builtins or partials, or depending on values which can't be described.
+    Globals and methods a handler calls aren't described.
+    '''
+    func = getattr(func, '__func__', func)
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return None
+    parts, stack = [], [code]
+    while stack:
+        code = stack.pop()
+        parts.append(repr(code.co_code))
+        parts.append(repr(code.co_names))
+        for x in code.co_consts:
+            if isinstance(x, type(code)):
+                stack.append(x)
+            elif isinstance(x, frozenset):
+                parts.append(repr(sorted(x, key=repr)))
+            else:
+                parts.append(repr(x))
+    cells = [x.cell_contents for x in func.__closure__ or ()]
+    for x in list(func.__defaults__ or ()) + cells:
+        x = _value(x)
+        if x is None:
+            return None
+        parts.append(x)
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _handlers(handlers):
+    '''Returns strings identifying the code of the handler of each item,
+    or None if a handler can't be identified.
+    '''
+    result = []
+    for k, v in handlers.items():
+        code = _code(v)
+        if code is None:
+            return None
+        result.append('{}={}'.format(_name(k), code))
+    return sorted(result)
+
+
+def _plan(cls):
+    '''Returns the name of a class, the names of the attributes describing
+    its instances, and a function getting them at once when they are only
+    properties and text values, which don't need _plain().
+    '''
+    names = [k for klass in cls.__mro__ for k in getattr(klass, '__slots__', ())
+             if k not in _links]
+    get = None
+    if set(names) <= set(('_props', 'value')) and (
+            'value' not in names or issubclass(cls, c.Text)):
+        get = attrgetter(*names) if names else (lambda x: None)
+    _plans[cls] = (_name(cls), names, get)
+    return _plans[cls]
+
+
+def _plain(value):
+    '''Converts arrays with a tolist method, e.g. columns of a
+    ColumnarTable, so that their repr holds all their values.
+    '''
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_plain(x) for x in value]
+    return value
+
+
+def _structure(components, parts):
+    '''Appends strings describing the subtrees of components to a list:
+    the class and the repr of the attributes of each node, and the ends
+    of the lists of children. Returns False if there is a Lazy component.
+    Walks the trees iteratively to support any nesting depth.
+    '''
+    stack = [None] + list(reversed(components))
+    while stack:
+        x = stack.pop()
+        if x is None:
+            parts.append(')')
+            continue
+        name, names, get = _plans.get(type(x)) or _plan(type(x))
+        parts.append(name)
+        if get is not None:
+            parts.append(repr(get(x)))
+        elif isinstance(x, c.Lazy):
+            return False
+        else:
+            for k in names:
+                v = getattr(x, k, None)
+                if isinstance(v, c._Component):
+                    stack.append(v)
+                else:
+                    parts.append(repr(_plain(v)))
+        children = getattr(x, 'components', None)
+        if children is not None:
+            stack.append(None)
+            stack.extend(reversed(children))
+    return True
+
+
+class DiskCache(object):
+    '''Cache of rendered documents in a directory, shared by processes and
+    runs. An entry is keyed by a hash of the structure of the document to
+    render, including the citation, the Docify version, the formatter
+    class, the code of its class and instance handlers and its settings,
+    so a document which didn't change since it was cached is never
+    formatted again and its output is streamed from disk.
+
+    Entries are written to a temporary file and renamed into place, so
+    processes sharing a directory never read a partial entry, and readers
+    of an evicted entry keep reading it on POSIX systems. When the total
+    size of the entries exceeds ``maxsize``, the least recently used ones
+    are removed until it is below 90% of it. The entries are scanned
+    when this object wrote 1/16 of ``maxsize`` since the last scan, so
+    each process sharing the directory can exceed it by that much.
+    Temporary files left by crashed processes are removed by the scans
+    once they are ``stale`` seconds old.
+
+    Documents with Lazy children are rendered without the cache, as they
+    can't be hashed without formatting them, and so are formatters with
+    handlers whose code can't be identified, e.g. partials. Changes of
+    functions called by handlers, or of settings other than plain values,
+    sets of classes and escapers, aren't seen, so clear the cache when
+    they change. Properties should be plain values with a stable
+    ``repr``. Create formatters with ``copy=False``, as a copy is made
+    when the formatter is created, even if the output is then cached.
+
+    :param str path: Directory of the cache. Created if missing.
+    :param int maxsize: Maximum total size of the entries, in bytes.
+        Default is 2 ** 30.
+    :param int stale: Age in seconds after which :meth:`prune` removes a
+        temporary file which isn't written anymore, e.g. after a crash.
+        Default is 3600.
+
+    Example usage: ::
+
+        cache = DiskCache('/var/cache/docify')
+        for doc in docs:
+            with open(name(doc), 'w') as f:
+                cache.render_to(HTML(doc, copy=False), f)
+        print(cache.hits, cache.misses)
+    '''
+
+    def __init__(self, path, maxsize=2 ** 30, stale=3600):
+        self.path = path
+        self.maxsize = maxsize
+        self.stale = stale
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.size = None
+        self.written = 0
+
+    def key(self, formatter):
+        '''Returns the key of the output of a formatter, or None if its
+        document has Lazy children or one of its handlers can't be
+        identified.
+
+        :param Formatter formatter: Formatter to render with.
+        '''
+        formatter.prepare()
+        cls = type(formatter)
+        if cls not in _classes:
+            _classes[cls] = _handlers(cls.registry()[0])
+        handlers = _handlers(formatter.handlers)
+        if _classes[cls] is None or handlers is None:
+            return None
+        parts = [docify.__version__, _name(cls), _name(type(formatter.doc))]
+        parts += _classes[cls] + ['instance'] + handlers + _settings(formatter)
+        # The citation is a child of the document or a virtual trailer
+        # depending on copy, which doesn't change the output
+        if not _structure(formatter.children(formatter.doc), parts):
+            return None
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+    def iter_render(self, formatter, size=8192):
+        '''Renders the formatter's document chunk by chunk, from the cache
+        if it holds it. Otherwise the output is written into the cache
+        while it is yielded. See :meth:`Formatter.iter_render`.
+
+        :param Formatter formatter: Formatter to render with.
+        :param int size: Length of the chunks. Default is 8192.
+        '''
+        key = self.key(formatter)
+        if key is None:
+            self.bypasses += 1
+            for chunk in formatter.iter_render(size):
+                yield chunk
+            return
+
+        path = self._file(key)
+        try:
+            f = io.open(path, encoding='utf-8', newline='')
+        except EnvironmentError:
+            pass
+        else:
+            self.hits += 1
+            with f:
+                try:
+                    os.utime(path, None)
+                except EnvironmentError:
+                    pass
+                for chunk in iter(lambda: f.read(size or 8192), ''):
+                    yield chunk
+            return
+
+        self.misses += 1
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except EnvironmentError:
+                pass
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp')
+        try:
+            with io.open(fd, 'w', encoding='utf-8', newline='') as f:
+                for chunk in formatter.iter_render(size):
+                    f.write(chunk)
+                    yield chunk
+            _replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except EnvironmentError:
+                pass
+            raise
+        # Other processes may be writing too, so the entries are rescanned
+        # once this one wrote 1/16 of maxsize since the last scan
+        self.written += os.path.getsize(path)
+        if (self.size is None or self.size + self.written > self.maxsize
+                or self.written > self.maxsize // 16):
+            self.prune()
+
+    def render(self, formatter):
+        '''Returns the rendered document of a formatter, from the cache if
+        it holds it.
+
+        :param Formatter formatter: Formatter to render with.
+        '''
+        return ''.join(self.iter_render(formatter, 2 ** 20))
+
+    def render_to(self, formatter, fp, encoding=None, size=8192):
+        '''Renders the document of a formatter into a file-like object
+        chunk by chunk, from the cache if it holds it.
+        See :meth:`Formatter.render_to`.
+
+        :param Formatter formatter: Formatter to render with.
+        :param file fp: Object with a ``write`` method, or a socket.
+        :param str encoding: Encoding to write bytes with. Default is None.
+        :param int size: Length of the chunks. Default is 8192.
+        '''
+        write = fp.write if hasattr(fp, 'write') else fp.sendall
+        for chunk in self.iter_render(formatter, size):
+            if encoding is not None:
+                chunk = chunk.encode(encoding)
+            write(chunk)
+
+    def _scan(self):
+        '''Returns the path, size and modification time of each entry and
+        of each temporary file.
+        '''
+        entries, temps = [], []
+        for directory in os.listdir(self.path):
+            directory = os.path.join(self.path, directory)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except EnvironmentError:
+                    continue
+                result = temps if name.startswith('.tmp') else entries
+                result.append((path, st.st_size, st.st_mtime))
+        return entries, temps
+
+    def entries(self):
+        '''Returns the path, size and last access time of each entry.'''
+        return self._scan()[0]
+
+    def _remove_stale(self, temps):
+        '''Removes the temporary files not written for ``stale`` seconds,
+        left by processes which crashed while writing an entry. Returns the
+        total size of the others.
+        '''
+        size, limit = 0, time.time() - self.stale
+        for path, n, mtime in temps:
+            if mtime < limit:
+                try:
+                    os.remove(path)
+                    continue
+                except EnvironmentError:
+                    pass
+            size += n
+        return size
+
+    def prune(self):
+        '''Removes the least recently used entries until the total size is
+        below 90% of ``maxsize``, if it exceeds ``maxsize``. Entries are
+        rescanned from disk, to account for other processes. Temporary
+        files being written count towards the size, and stale ones are
+        removed.
+        '''
+        entries, temps = self._scan()
+        self.size = sum(x[1] for x in entries) + self._remove_stale(temps)
+        self.written = 0
+        if self.size <= self.maxsize:
+            return
+        for path, size, _ in sorted(entries, key=lambda x: x[2]):
+            if self.size <= self.maxsize * 0.9:
+                break
+            try:
+                os.remove(path)
+            except EnvironmentError:
+                continue
+            self.size -= size
+            self.evictions += 1
+
+    def clear(self):
+        '''Removes all entries and stale temporary files.'''
+        entries, temps = self._scan()
+        for path, _, _ in entries:
+            try:
+                os.remove(path)
+            except EnvironmentError:
+                pass
+        self.size = self._remove_stale(temps)
+
+    def stats(self):
+        '''Returns the hits, misses, bypasses and evictions counted by this
+        object, with the number and total size of the entries on disk.
+        '''
+        entries = self.entries()
+        return {'hits': self.hits, 'misses': self.misses,
+                'bypasses': self.bypasses, 'evictions': self.evictions,
+                'entries': len(entries), 'size': sum(x[1] for x in entries)}
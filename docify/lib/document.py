@@ -1,5 +1,3 @@
-from copy import deepcopy
-
 from docify.lib import components as c
 
 __all__ = ['Document']
@@ -21,16 +19,23 @@ class Document(object):
         print(Whatever(doc))
     '''
 
+    __slots__ = ('components', 'depth', '_rendered')
+
     def __init__(self, *components):
         self.components = []
         self.depth = 0
+        self._rendered = None
         for c in components:
             self.add(c)
 
     def __repr__(self):
-        return '{}(\n{}{})'.format(
-            self.__class__.__name__, ' ' * (self.depth + 1) * 4,
-            ('\n' + (' ' * (self.depth + 1) * 4)).join(map(str, self.components)))
+        return c._repr(self)
+
+    def __getstate__(self):
+        return c._getstate(self)
+
+    def __setstate__(self, state):
+        c._setstate(self, state)
 
     def add(self, component):
         '''Adds a component in the doc.
@@ -39,9 +44,24 @@ class Document(object):
         '''
         if not isinstance(component, c._Component):
             component = c.Span(component)
+        if component.parent is not None:
+            c._forget(component)
         component.setparent(self)
 
         if len(self.components) > 0:
             self.components[-1].setnext(component)
+            c._invalidate(self.components[-1])
 
         self.components.append(component)
+        c._invalidate(self)
+
+    def memory_stats(self, formatters=(), **kwargs):
+        '''Estimates the memory held by the document, and optionally
+        measures what rendering it allocates.
+        See :func:`docify.lib.memory.memory_stats`.
+
+        :param list formatters: Formatter classes to measure renders of.
+        :param kwargs: Keyword arguments for the formatters.
+        '''
+        from docify.lib.memory import memory_stats
+        return memory_stats(self, formatters, **kwargs)
@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from threading import Lock
+
+from docify.lib.components import Text
+
+__all__ = ['Escaper', 'HTML_ESCAPER', 'MARKDOWN_ESCAPER']
+
+
+class Escaper(object):
+    '''Escapes strings for use as text in a markup language.
+
+    Strings without any of the special characters are returned as they
+    are. Others are escaped either with a table of replacements, applied
+    in order, or with a regular expression, and the result is kept in a
+    bounded LRU cache, which pays off for repeated values like table cells.
+    An escaper can be shared by threads.
+
+    :param str chars: Characters that can need escaping.
+    :param list table: Pairs of a string and its replacement.
+    :param str pattern: Regular expression to replace instead of the table.
+    :param str repl: Replacement for the matches of pattern.
+    :param int maxsize: Maximum number of cached strings. Use 0 to disable
+        the cache. Default is 4096.
+
+    Example usage: ::
+
+        escaper = Escaper('&<>', [('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;')])
+        escaper.escape('a < b')  # 'a &lt; b'
+    '''
+
+    def __init__(self, chars, table=(), pattern=None, repl=None, maxsize=4096):
+        self.chars = chars
+        self.table = tuple(table)
+        self.pattern = pattern
+        self.repl = repl
+        self._regex = None
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self._lock = Lock()
+        # escape() checks the first 3 characters inline, repeated if there
+        # are fewer. Without characters, no string needs escaping.
+        self._first = tuple((chars * 3)[:3]) if chars else None
+        self._rest = chars[3:]
+
+    @property
+    def regex(self):
+        '''Compiled pattern, or None. Compiled on first use, so that
+        importing the formatters doesn't import re.
+        '''
+        if self._regex is None and self.pattern is not None:
+            import re
+            self._regex = re.compile(self.pattern)
+        return self._regex
+
+    def special(self, value):
+        '''Whether a string contains any of the special characters.
+
+        :param str value: String to check.
+        '''
+        for ch in self.chars:
+            if ch in value:
+                return True
+        return False
+
+    def replace(self, value):
+        '''Escapes a string without the fast path or the cache.
+
+        :param str value: String to escape.
+        '''
+        if self.pattern is not None:
+            return self.regex.sub(self.repl, value)
+        for old, new in self.table:
+            value = value.replace(old, new)
+        return value
+
+    def escape(self, value):
+        '''Escapes a string.
+
+        :param str value: String to escape.
+        '''
+        if self._first is None:
+            return value
+        a, b, c = self._first
+        if a not in value and b not in value and c not in value and not (
+                self._rest and self.special(value)):
+            return value
+        if not self.maxsize:
+            return self.replace(value)
+
+        # Hits only use single operations of the cache, which are atomic,
+        # and misses are locked so that evictions don't race
+        cache = self.cache
+        output = cache.get(value)
+        if output is not None:
+            try:
+                cache.move_to_end(value)
+            except KeyError:
+                pass
+            return output
+        output = self.replace(value)
+        with self._lock:
+            if value not in cache:
+                if len(cache) >= self.maxsize:
+                    cache.popitem(last=False)
+                cache[value] = output
+        return output
+
+    __call__ = escape
+
+    def bulk(self, values):
+        '''Escapes many strings at once and returns them as a list.
+        Other objects, like components, are returned as they are. With a
+        table, short strings like table cells are joined and escaped in a
+        single pass.
+
+        :param iterable values: Strings to escape.
+        '''
+        values = list(values)
+        if self.pattern is None and all(isinstance(v, str) for v in values):
+            joined = '\0'.join(values)
+            if not self.special(joined):
+                return values
+            short = len(joined) < 64 * len(values)
+            if short and joined.count('\0') == len(values) - 1:
+                return self.replace(joined).split('\0')
+        escape = self.escape
+        return [escape(v) if isinstance(v, str) else v for v in values]
+
+    def subtree(self, node):
+        '''Escapes the values of all Text leaves of a subtree in one bulk()
+        pass. Returns a new dict mapping each Text component to its escaped
+        value. Lazy children are not produced, so they aren't included.
+
+        :param Component|Document node: Root of the subtree.
+        '''
+        leaves, stack = [], [node]
+        while stack:
+            x = stack.pop()
+            if isinstance(x, Text):
+                leaves.append(x)
+            else:
+                stack.extend(reversed(getattr(x, 'components', ())))
+        return dict(zip(leaves, self.bulk([x.value for x in leaves])))
+
+
+HTML_ESCAPER = Escaper('&<>', [('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;')])
+
+MARKDOWN_ESCAPER = Escaper(
+    '_*', pattern=r'((([_*]).+?\3[^_*]*)*)([_*])', repl=r'\g<1>\\\\\g<4>')
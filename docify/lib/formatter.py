@@ -1,8 +1,19 @@
-from copy import deepcopy
-
 from docify import components as c
 
-__all__ = ['Formatter']
+__all__ = ['Formatter', 'handles']
+
+
+def handles(*items):
+    '''Decorator to register a formatter method as the handler for given
+    items. Handlers are collected once per formatter class, and a subclass
+    can override one by redefining the method with the same name.
+
+    :param list items: List of items to handle.
+    '''
+    def decorator(func):
+        func._handles = items
+        return func
+    return decorator
 
 
 class Formatter(object):
@@ -10,28 +21,157 @@ class Formatter(object):
 
     :param Document document: Document to format.
     :param bool cite: Whether to add the grumpy citation. Default is True.
+    :param bool copy: Whether to work on a deep copy of the document.
+        When False, the document is neither copied nor mutated and the
+        citation is rendered as a virtual trailer, which handlers of the
+        document get from children(). Default is True.
+    :param RenderCache cache: Cache of rendered subtrees to reuse across
+        renders, see :class:`docify.lib.memo.RenderCache`. Default is None.
+    :param Profiler profiler: Profiler to record statistics of renders,
+        see :class:`docify.lib.profiling.Profiler`. Default is None.
 
     Example usage: ::
 
         class MyFormatter(Formatter):
 
-            def update_handlers(self):
-                super(MyFormatter, self).update_handlers()
+            @handles(Span, Paragraph)
+            def handle_span_and_paragraph(self, obj):
+                return str(obj)
+
+            @handles(Section)
+            def handle_section(self, obj):
+                yield '<section>'
+                for x in obj.components:
+                    yield x
+                yield '</section>'
 
-                @self.handles(Span, Paragraph)
-                def handle_span_and_paragraph(self, obj):
-                    return str(obj)
+    A handler returns either a string or an iterable of fragments, which
+    are strings and components to format in their place. Fragments are
+    written one by one into a sink by write(), so no string is built for
+    a subtree and output is copied once, whatever the nesting depth.
+
+    Handlers can also be registered per instance by overriding
+    ``update_handlers`` and using the ``self.handles`` decorator, or by
+    setting items of ``self.handlers``. Instance handlers take precedence
+    over class handlers.
     '''
 
-    def __init__(self, document, cite=True):
-        self.handlers = {}
-        self.doc = deepcopy(document)
-        if cite:
-            self.doc.add(c.Hr())
-            self.doc.add(c.Footer(c.P(c.Small(c.Cite(
+    def __init__(self, document, cite=True, copy=True, cache=None,
+                 profiler=None):
+        self._handlers = {}
+        self.cache = cache
+        self.profiler = profiler
+        self._updated = False
+        self._dispatch = self.registry()[1]
+        self.trailer = []
+        if copy:
+            from copy import deepcopy
+            self.doc = deepcopy(document)
+            if cite:
+                for x in self.citation():
+                    self.doc.add(x)
+        else:
+            self.doc = document
+            if cite:
+                self.trailer = self.citation()
+                self.link_trailer()
+
+    def citation(self):
+        '''Returns the components of the grumpy citation.'''
+        return [
+            c.Hr(),
+            c.Footer(c.P(c.Small(c.Cite(
                 'This document was generated with ',
                 c.A('Docify', 'https://github.com/rapidstack/Docify'),
-                '.')))))
+                '.'))))
+        ]
+
+    def link_trailer(self):
+        '''Link the trailer components as if they were added to the
+        document, without touching the document itself.
+        '''
+        for i, x in enumerate(self.trailer):
+            x.setparent(self.doc)
+            if i > 0:
+                self.trailer[i - 1].setnext(x)
+            elif self.doc.components:
+                x.prev = self.doc.components[-1]
+
+    def children(self, obj):
+        '''Returns the child components of an object to format.
+        For the root document it includes the virtual trailer.
+
+        :param Component|Document obj: Parent object.
+        '''
+        if obj is self.doc and self.trailer:
+            return obj.components + self.trailer
+        return obj.components
+
+    def sibling(self, component):
+        '''Returns the component next to the given component.
+        Unlike ``component.next``, it takes the virtual trailer into account
+        and looks into Lazy siblings for their first child.
+
+        :param Component component: Component to look from.
+        '''
+        nxt = component.next
+        while isinstance(nxt, c.Lazy):
+            head = nxt.peek()
+            if head is not None:
+                return head
+            component, nxt = nxt, nxt.next
+        if (nxt is None and self.trailer and component.parent is self.doc and
+                component is not self.trailer[-1]):
+            return self.trailer[0]
+        return nxt
+
+    def expand(self, components):
+        '''Yields the components, replacing Lazy ones with their children.
+
+        :param iterable components: Components to expand.
+        '''
+        for x in components:
+            if isinstance(x, c.Lazy):
+                for y in x.items():
+                    yield y
+            else:
+                yield x
+
+    @handles(c.Lazy)
+    def handle_lazy(self, obj):
+        return obj.items()
+
+    @property
+    def handlers(self):
+        '''Instance handlers of items. Getting it gives the formatter its
+        own dispatch cache, emptied each time since the handlers may then
+        be changed.
+        '''
+        self._dispatch = {}
+        return self._handlers
+
+    @handlers.setter
+    def handlers(self, handlers):
+        self._handlers = handlers
+        self._dispatch = {}
+
+    @classmethod
+    def registry(cls):
+        '''Returns the class handlers and the class dispatch cache.
+        They are resolved once per formatter class from the methods
+        decorated with :func:`handles`, including subclass overrides.
+        The dispatch cache is shared by the instances without instance
+        handlers.
+        '''
+        if '_registry' not in cls.__dict__:
+            names = {}
+            for klass in reversed(cls.__mro__):
+                for name, attr in vars(klass).items():
+                    for item in getattr(attr, '_handles', ()):
+                        names[item] = name
+            cls._registry = (
+                dict((i, getattr(cls, n)) for i, n in names.items()), {})
+        return cls._registry
 
     def handles(self, *items):
         '''Initializes decorator to register a handler for given items.
@@ -41,30 +181,234 @@ class Formatter(object):
         def decorator(func):
             for i in items:
                 self.handlers.update({i: func})
+            self._dispatch = {}
             return func
         return decorator
 
     def update_handlers(self):
-        '''Update handlers. Called by render() before
+        '''Update instance handlers. Called once by render() before
         performing format operation.
         '''
         pass
 
+    def handler(self, otype):
+        '''Returns the handler for given type or None if not found.
+        The type's MRO is searched, so subclasses of components are
+        formatted like their base. Lookups are cached.
+
+        :param type otype: Type of object to format.
+        '''
+        try:
+            return self._dispatch[otype]
+        except KeyError:
+            pass
+
+        registry, shared = self.registry()
+        handlers = self._handlers
+        if handlers and self._dispatch is shared:
+            self._dispatch = {}
+        found = None
+        for t in otype.__mro__:
+            if t in handlers:
+                found = handlers[t]
+                break
+            if t in registry:
+                found = registry[t]
+                break
+        self._dispatch[otype] = found
+        return found
+
     def format(self, obj):
         '''Parse and format an object using appropriate handler.
         If handler is not found, it will use `str`.
 
+        A handler either returns the formatted string or an iterable of
+        fragments, where a fragment is a string or a component to be
+        formatted in its place. The output of each component is joined
+        into a string for its parent, so prefer write() for whole documents.
+
         :param Component|Document obj: Object to format.
         '''
-        otype = type(obj)
-        if otype not in self.handlers:
+        if self.cache is not None:
+            output = self.cache.get(obj)
+            if output is not None:
+                return output
+
+        try:
+            handler = self._dispatch[type(obj)]
+        except KeyError:
+            handler = self.handler(type(obj))
+        if handler is None:
             return str(obj)
-        return self.handlers[otype](self, obj)
+        output = handler(self, obj)
+        if not isinstance(output, str):
+            output = self.join(output)
+
+        if self.cache is not None:
+            self.cache.put(obj, output)
+        return output
+
+    def join(self, fragments):
+        '''Join fragments into a string, formatting the components among
+        them recursively.
+
+        :param iterable fragments: Strings and components.
+        '''
+        return ''.join([x if isinstance(x, str) else self.format(x)
+                        for x in fragments])
+
+    def iterformat(self, obj):
+        '''Same as format() but drives the handlers from an explicit stack
+        instead of recursing, so the nesting depth is not limited by the
+        interpreter's recursion limit. Yields the formatted chunks.
+
+        :param Component|Document obj: Object to format.
+        '''
+        if self.profiler is not None:
+            for x in self.profiler.iterformat(self, obj):
+                yield x
+            return
+        if self.cache is not None:
+            for x in self._itercached(obj):
+                yield x
+            return
+
+        dispatch = self._dispatch
+        stack = [iter((obj,))]
+        while stack:
+            for x in stack[-1]:
+                if isinstance(x, str):
+                    yield x
+                    continue
+                try:
+                    handler = dispatch[type(x)]
+                except KeyError:
+                    handler = self.handler(type(x))
+                if handler is None:
+                    yield str(x)
+                    continue
+                result = handler(self, x)
+                if isinstance(result, str):
+                    yield result
+                    continue
+                stack.append(iter(result))
+                break
+            else:
+                stack.pop()
+
+    def _itercached(self, obj):
+        '''Same as iterformat() but reuses and fills the cache.'''
+        cache = self.cache
+        chunks = []
+        stack = [(iter((obj,)), None, 0)]
+        while stack:
+            for x in stack[-1][0]:
+                if isinstance(x, str):
+                    chunks.append(x)
+                    yield x
+                    continue
+                output = cache.get(x)
+                if output is None:
+                    handler = self.handler(type(x))
+                    output = str(x) if handler is None else handler(self, x)
+                    if not isinstance(output, str):
+                        stack.append((iter(output), x, len(chunks)))
+                        break
+                    cache.put(x, output)
+                chunks.append(output)
+                yield output
+            else:
+                _, x, start = stack.pop()
+                if x is not None:
+                    cache.put(x, ''.join(chunks[start:]))
+
+    def prepare(self):
+        '''Prepare the formatter for rendering. Calls update_handlers()
+        the first time only. Formatters with instance handlers get their
+        own dispatch cache, reset on each call since the handlers may have
+        changed.
+        '''
+        if not self._updated:
+            self.update_handlers()
+            self._updated = True
+        if self._handlers:
+            self._dispatch = {}
+
+    def write(self, obj, sink):
+        '''Formats an object into a sink, fragment by fragment, in
+        document order. See iterformat().
+
+        :param Component|Document obj: Object to format.
+        :param callable sink: Function called with each formatted string,
+            e.g. ``list.append`` or ``file.write``.
+        '''
+        for x in self.iterformat(obj):
+            sink(x)
 
     def render(self):
-        '''Renders the formatted document. Called by __repr__.'''
-        self.update_handlers()
-        return self.format(self.doc)
+        '''Renders the formatted document by writing it into a list.
+        Called by __repr__.
+        '''
+        self.prepare()
+        output = []
+        self.write(self.doc, output.append)
+        return ''.join(output)
+
+    def iter_render(self, size=8192):
+        '''Renders the formatted document chunk by chunk in document order.
+        Memory is bounded by the depth of the document and the chunk size
+        rather than by the size of the output.
+
+        :param int size: Minimum length of the yielded chunks, except for
+            the last one. Use 0 to yield fragments as they are formatted.
+            Default is 8192.
+        '''
+        self.prepare()
+        chunks, n = [], 0
+        for x in self.iterformat(self.doc):
+            chunks.append(x)
+            n += len(x)
+            if n >= size:
+                yield ''.join(chunks)
+                chunks, n = [], 0
+        if chunks:
+            yield ''.join(chunks)
+
+    def render_to(self, fp, encoding=None, size=8192):
+        '''Renders the formatted document into a file-like object
+        chunk by chunk. See iter_render().
+
+        :param file fp: Object with a ``write`` method, or a socket.
+        :param str encoding: Encoding to write bytes with, e.g. 'utf-8'.
+            Required for binary files and sockets. Default is None.
+        :param int size: Minimum length of the written chunks.
+            Default is 8192.
+        '''
+        write = fp.write if hasattr(fp, 'write') else fp.sendall
+        for chunk in self.iter_render(size):
+            if encoding is not None:
+                chunk = chunk.encode(encoding)
+            write(chunk)
+
+    def render_async(self, writer, encoding='utf-8', size=8192):
+        '''Returns a coroutine rendering the formatted document into an
+        asyncio stream writer without blocking the event loop.
+        Requires Python 3.5+. See :func:`docify.lib.aio.render_async`.
+
+        Example usage: ::
+
+            await HTML(doc).render_async(writer)
+        '''
+        from docify.lib.aio import render_async
+        return render_async(self, writer, encoding, size)
+
+    def render_parallel(self, workers=None, chunks=4):
+        '''Renders the formatted document, formatting the top-level
+        components in a pool of processes.
+        See :func:`docify.lib.parallel.render_parallel`.
+        '''
+        from docify.lib.parallel import render_parallel
+        return render_parallel(self, workers, chunks)
 
     def __repr__(self):
         return self.render()
@@ -0,0 +1,103 @@
+from collections import OrderedDict
+
+from docify import components as c
+
+__all__ = ['RenderCache']
+
+
+class RenderCache(object):
+    '''Cache of the rendered output of composite components and documents.
+    Pass it to a formatter to only reformat the subtrees that changed
+    through ``add()`` since the last render. The output is stored on the
+    components themselves and dropped by ``add()`` for the changed
+    component, its previous sibling and their ancestors. Components moved
+    to another parent are dropped along with their whole subtree, as
+    their output may depend on their ancestors.
+
+    A cache should only be shared by formatters of the same class and
+    settings, and is only useful with ``copy=False``.
+
+    :param int maxsize: Maximum total length of the cached output, in
+        characters. Least recently used entries are evicted first, along
+        with the entries of their ancestors. Default is 2 ** 24.
+
+    Example usage: ::
+
+        cache = RenderCache()
+        fmt = HTML(doc, copy=False, cache=cache)
+        fmt.render()
+        doc.components[3].add('Some more text')
+        fmt.render()  # Only reformats doc and its 4th component
+    '''
+
+    def __init__(self, maxsize=2 ** 24):
+        self.maxsize = maxsize
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, node):
+        '''Returns the cached output of a node or None if not found.
+
+        :param Component|Document node: Node to look up.
+        '''
+        rendered = getattr(node, '_rendered', None)
+        if rendered and self in rendered:
+            self.hits += 1
+            self.entries[node] = self.entries.pop(node)
+            return rendered[self]
+        if hasattr(node, 'components'):
+            self.misses += 1
+        return None
+
+    def put(self, node, output):
+        '''Caches the output of a node. Ignored unless all of its composite
+        children are cached, so that a node without cached output never
+        has an ancestor with cached output. Parents of Lazy are ignored.
+
+        :param Component|Document node: Node that was formatted.
+        :param str output: Formatted output.
+        '''
+        if not hasattr(node, 'components') or not hasattr(node, '_rendered'):
+            return
+        for x in node.components:
+            if isinstance(x, c.Lazy):
+                return
+            if hasattr(x, 'components') and not (
+                    x._rendered and self in x._rendered):
+                return
+        if node._rendered is None:
+            node._rendered = {}
+        self.discard(node)
+        node._rendered[self] = output
+        self.entries[node] = len(output)
+        self.size += len(output)
+        while self.size > self.maxsize and self.entries:
+            self.evict(next(iter(self.entries)))
+
+    def discard(self, node):
+        '''Drops the cached output of a node.
+
+        :param Component|Document node: Node to drop.
+        '''
+        if node._rendered and self in node._rendered:
+            del node._rendered[self]
+            self.size -= self.entries.pop(node)
+
+    def evict(self, node):
+        '''Drops the cached output of a node and its ancestors.
+
+        :param Component|Document node: Node to drop.
+        '''
+        while node is not None and node._rendered and self in node._rendered:
+            self.discard(node)
+            node = getattr(node, 'parent', None)
+
+    def clear(self):
+        '''Drops all cached output.'''
+        for node in list(self.entries):
+            self.discard(node)
@@ -0,0 +1,180 @@
+import struct
+import sys
+
+from docify.lib import components as c
+from docify.lib.document import Document
+
+__all__ = ['memory_stats', 'measure']
+
+#: Parts of the memory held by a document, as reported by memory_stats().
+SHARES = ('objects', 'links', 'text', 'props', 'children', 'cells', 'cache')
+
+_pointer = struct.calcsize('P')
+_links = ('parent', 'prev', 'next')
+
+
+def _deep(obj, seen):
+    '''Returns the size of a value and of the values it holds, counting
+    each object once, e.g. strings shared in compact mode.
+
+    :param object obj: Value to measure.
+    :param set seen: Ids of the objects already counted.
+    '''
+    size = 0
+    stack = [obj]
+    while stack:
+        x = stack.pop()
+        if id(x) in seen:
+            continue
+        seen.add(id(x))
+        size += sys.getsizeof(x)
+        if isinstance(x, dict):
+            for k, v in x.items():
+                stack.append(k)
+                if not isinstance(v, (c._Component, Document)):
+                    stack.append(v)
+        elif isinstance(x, (list, tuple)):
+            stack.extend(x)
+    return size
+
+
+def _traced(function):
+    '''Calls a function with tracemalloc on. Returns its result, the memory
+    allocated by the call and still held with the result, and the peak,
+    in bytes. Raises RuntimeError without tracemalloc, i.e. before
+    Python 3.4.
+    '''
+    try:
+        import tracemalloc
+    except ImportError:
+        raise RuntimeError('Measuring allocations requires tracemalloc, '
+                           'which is available from Python 3.4')
+    if tracemalloc.is_tracing():
+        raise RuntimeError('tracemalloc is already tracing')
+    tracemalloc.start()
+    try:
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {'allocated': current, 'peak': peak}
+
+
+def _render(formatter, document, kwargs):
+    return _traced(lambda: formatter(document, **kwargs).render())[1]
+
+
+def memory_stats(node, formatters=(), **kwargs):
+    '''Estimates the memory held by a document or a component and its
+    subtree. The tree is walked iteratively, so any nesting depth is
+    supported. Lazy children are not expanded.
+
+    Sizes are deep estimates from ``sys.getsizeof``. Each object is counted
+    once, and in one of these shares:
+
+    * objects: component instances, less their links.
+    * links: parent, prev and next slots of the components.
+    * text: values of Text and Anchor components.
+    * props: properties dicts, their keys and values.
+    * children: lists of children of composite components.
+    * cells: columns of ColumnarTable components and their values.
+    * cache: output cached by formatters on the nodes.
+
+    Given formatters, each one renders the document with tracemalloc on,
+    to measure what it actually allocates. This requires a Document and
+    Python 3.4+.
+
+    :param Document|Component node: Root of the tree to measure.
+    :param list formatters: Formatter classes to measure renders of.
+    :param kwargs: Keyword arguments for the formatters, e.g. copy=False.
+
+    Returns a dict with keys nodes, bytes, depth (of the deepest node,
+    the root being 0), fanout (most children of a node), classes
+    (``{name: {'count': int, 'bytes': int}}``), shares (bytes by share)
+    and renders (``{name: {'allocated': int, 'peak': int}}``).
+
+    Example usage: ::
+
+        stats = doc.memory_stats(formatters=[HTML, Markdown])
+        print(stats['shares']['text'], stats['renders']['HTML']['peak'])
+    '''
+    seen = set()
+    classes = {}
+    shares = dict.fromkeys(SHARES, 0)
+    nodes = depth = fanout = 0
+    stack = [(node, 0)]
+    while stack:
+        x, level = stack.pop()
+        nodes += 1
+        depth = max(depth, level)
+        seen.add(id(x))
+        own = sys.getsizeof(x)
+        size = own
+        if isinstance(x, c._Component):
+            links = _pointer * len(_links)
+            shares['links'] += links
+            own -= links
+        shares['objects'] += own
+
+        value = getattr(x, 'value', None)
+        if isinstance(value, c._Component):
+            stack.append((value, level + 1))
+        elif value is not None:
+            n = _deep(value, seen)
+            shares['text'] += n
+            size += n
+
+        for share, attr in (('props', '_props'), ('cache', '_rendered')):
+            if getattr(x, attr, None) is not None:
+                n = _deep(getattr(x, attr), seen)
+                shares[share] += n
+                size += n
+
+        if isinstance(x, c.ColumnarTable):
+            n = _deep(x.headers, seen) + _deep(x.columns, seen)
+            shares['cells'] += n
+            size += n
+        elif getattr(x, 'components', None) is not None:
+            n = sys.getsizeof(x.components)
+            seen.add(id(x.components))
+            shares['children'] += n
+            size += n
+            fanout = max(fanout, len(x.components))
+            stack.extend((child, level + 1) for child in reversed(x.components))
+
+        stats = classes.setdefault(type(x).__name__, {'count': 0, 'bytes': 0})
+        stats['count'] += 1
+        stats['bytes'] += size
+
+    renders = {}
+    if formatters and not isinstance(node, Document):
+        raise TypeError('Renders can only be measured for a Document')
+    for formatter in formatters:
+        renders[formatter.__name__] = _render(formatter, node, kwargs)
+
+    return {'nodes': nodes, 'bytes': sum(shares.values()), 'depth': depth,
+            'fanout': fanout, 'classes': classes, 'shares': shares,
+            'renders': renders}
+
+
+def measure(build, formatters=(), **kwargs):
+    '''Measures with tracemalloc what building a document and rendering it
+    with each formatter actually allocate. Requires Python 3.4+.
+
+    :param function build: Function returning the document to measure.
+    :param list formatters: Formatter classes to measure renders of.
+    :param kwargs: Keyword arguments for the formatters, e.g. copy=False.
+
+    Returns a dict with key 'build' and the name of each formatter, each
+    mapping to ``{'allocated': int, 'peak': int}`` in bytes: the memory
+    still held after the step and the peak during the step.
+
+    Example usage: ::
+
+        measure(lambda: Document(*paragraphs), [HTML, Markdown], copy=False)
+    '''
+    document, stats = _traced(build)
+    result = {'build': stats}
+    for formatter in formatters:
+        result[formatter.__name__] = _render(formatter, document, kwargs)
+    return result
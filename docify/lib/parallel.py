@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+
+from docify import components as c
+
+__all__ = ['render_parallel']
+
+_state = {}
+
+
+def _size(component):
+    '''Returns the number of components in a subtree.
+
+    :param Component component: Root of the subtree.
+    '''
+    n, stack = 0, [component]
+    while stack:
+        x = stack.pop()
+        n += 1
+        stack.extend(getattr(x, 'components', ()))
+        if isinstance(getattr(x, 'value', None), c._Component):
+            stack.append(x.value)
+    return n
+
+
+def _split(fragments, groups):
+    '''Splits the indexes of the components among fragments into
+    contiguous groups of similar subtree size.
+
+    :param list fragments: Fragments yielded by the root handler.
+    :param int groups: Number of groups to aim for.
+    '''
+    indexes = [i for i, x in enumerate(fragments) if not isinstance(x, str)]
+    sizes = [_size(fragments[i]) for i in indexes]
+    target = float(sum(sizes)) / max(groups, 1)
+    result, group, total = [], [], 0
+    for i, size in zip(indexes, sizes):
+        group.append(i)
+        total += size
+        if total >= target * (len(result) + 1):
+            result.append(group)
+            group = []
+    if group:
+        result.append(group)
+    return result
+
+
+def _init(formatter, fragments):
+    _state['formatter'] = formatter
+    _state['fragments'] = fragments
+
+
+def _format(indexes):
+    formatter, fragments = _state['formatter'], _state['fragments']
+    return [''.join(formatter.iterformat(fragments[i])) for i in indexes]
+
+
+def render_parallel(formatter, workers=None, chunks=4):
+    '''Renders a formatter's document, formatting the top-level
+    components in a pool of processes.
+
+    The top-level components are split into contiguous groups balanced by
+    subtree size and the output is reassembled in document order. Every
+    worker gets the whole document, so output depending on siblings across
+    group boundaries, like Markdown's line gaps, is the same as render().
+    On platforms supporting ``fork`` the document is inherited by the
+    workers, which only get the indexes of the components to format,
+    otherwise the formatter is pickled.
+
+    :param Formatter formatter: Formatter to render.
+    :param int workers: Number of processes. Default is the CPU count.
+    :param int chunks: Number of groups per process. Default is 4.
+    '''
+    formatter.prepare()
+    doc = formatter.doc
+    handler = formatter.handler(type(doc))
+    if handler is None:
+        return str(doc)
+    fragments = handler(formatter, doc)
+    if isinstance(fragments, str):
+        return fragments
+    fragments = list(fragments)
+
+    workers = workers or multiprocessing.cpu_count()
+    groups = _split(fragments, workers * chunks)
+    if hasattr(os, 'fork'):
+        # Set before the workers are forked, so they inherit it
+        _init(formatter, fragments)
+        context = multiprocessing
+        if hasattr(multiprocessing, 'get_context'):
+            context = multiprocessing.get_context('fork')
+        pool = context.Pool(workers)
+    else:
+        pool = multiprocessing.Pool(workers, _init, (formatter, fragments))
+    try:
+        results = pool.map(_format, groups)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+        _state.clear()
+    for group, result in zip(groups, results):
+        for i, txt in zip(group, result):
+            fragments[i] = txt
+    return ''.join(fragments)
@@ -0,0 +1,168 @@
+import json
+import time
+
+__all__ = ['Profiler', 'Stats']
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+class Stats(object):
+    '''Statistics of a component type or a handler.
+
+    :ivar int calls: Number of objects formatted.
+    :ivar float total: Time spent formatting them and their children,
+        counted once for nested objects of the same key, in seconds.
+    :ivar float self: Time spent in the handler itself, in seconds.
+    :ivar int bytes: Length of the output of the objects, counted once for
+        nested objects of the same key.
+    '''
+
+    __slots__ = ('calls', 'total', 'self', 'bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.self = 0.0
+        self.bytes = 0
+
+    def __repr__(self):
+        return 'Stats(calls={}, total={:.6f}, self={:.6f}, bytes={})'.format(
+            self.calls, self.total, self.self, self.bytes)
+
+
+class Profiler(object):
+    '''Collects statistics of renders per component type and per handler,
+    and optionally trace events to view in chrome://tracing or Perfetto.
+    Pass it to a formatter to profile render(), write(), iter_render()
+    and iterformat(). Without a profiler, formatters don't pay for it.
+
+    Time spent by the consumer of the output between two fragments, e.g.
+    writing them to a file, is not counted. The render cache of the
+    formatter is not used while profiling.
+
+    :param bool trace: Whether to record trace events. Default is False.
+
+    Example usage: ::
+
+        profiler = Profiler(trace=True)
+        HTML(doc, profiler=profiler).render()
+        print(profiler.report())
+        with open('trace.json', 'w') as f:
+            profiler.export_trace(f)
+    '''
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.clear()
+
+    def clear(self):
+        '''Drops all collected statistics and events.'''
+        self.types = {}
+        self.handlers = {}
+        self.events = []
+        self.clock = 0.0
+
+    def _stats(self, table, key):
+        try:
+            return table[key]
+        except KeyError:
+            table[key] = Stats()
+            return table[key]
+
+    def _record(self, keys, active, total, own, size):
+        for table, key in keys:
+            stats = self._stats(table, key)
+            stats.calls += 1
+            stats.self += own
+            if not active.get(key):
+                stats.total += total
+                stats.bytes += size
+
+    def iterformat(self, formatter, obj):
+        '''Same as Formatter.iterformat() but records the statistics.
+
+        :param Formatter formatter: Formatter to format with.
+        :param Component|Document obj: Object to format.
+        '''
+        types, handlers = self.types, self.handlers
+        active = {}
+        size = 0
+        # Each entry: fragments, keys, virtual start time, time of children,
+        # output size at start
+        stack = [(iter((obj,)), None, self.clock, [0.0], 0)]
+        mark = timer()
+        while stack:
+            for x in stack[-1][0]:
+                if isinstance(x, str):
+                    size += len(x)
+                    now = timer()
+                    self.clock += now - mark
+                    yield x
+                    mark = timer()
+                    continue
+
+                start = self.clock + timer() - mark
+                handler = formatter.handler(type(x))
+                keys = ((types, type(x).__name__), (handlers, getattr(
+                    handler, '__name__', 'str')))
+                result = str(x) if handler is None else handler(formatter, x)
+                if isinstance(result, str):
+                    size += len(result)
+                    end = self.clock + timer() - mark
+                    self._record(keys, active, end - start, end - start, len(result))
+                    stack[-1][3][0] += end - start
+                    self._event(keys, start, end, len(result))
+                    now = timer()
+                    self.clock += now - mark
+                    yield result
+                    mark = timer()
+                    continue
+
+                for _, key in keys:
+                    active[key] = active.get(key, 0) + 1
+                stack.append((iter(result), keys, start, [0.0], size))
+                break
+            else:
+                _, keys, start, children, before = stack.pop()
+                if keys is None:
+                    continue
+                end = self.clock + timer() - mark
+                for _, key in keys:
+                    active[key] -= 1
+                self._record(keys, active, end - start,
+                             end - start - children[0], size - before)
+                stack[-1][3][0] += end - start
+                self._event(keys, start, end, size - before)
+        self.clock += timer() - mark
+
+    def _event(self, keys, start, end, size):
+        if self.trace:
+            self.events.append({
+                'name': keys[0][1], 'cat': keys[1][1], 'ph': 'X',
+                'ts': start * 1e6, 'dur': (end - start) * 1e6,
+                'pid': 0, 'tid': 0, 'args': {'bytes': size}})
+
+    def report(self, by='types', sort='self', limit=None):
+        '''Returns the statistics as a text table.
+
+        :param str by: 'types' or 'handlers'. Default is 'types'.
+        :param str sort: Column to sort by, one of 'calls', 'total',
+            'self' or 'bytes'. Default is 'self'.
+        :param int limit: Maximum number of rows. Default is None.
+        '''
+        table = getattr(self, by)
+        rows = sorted(table.items(), key=lambda x: getattr(x[1], sort),
+                      reverse=True)[:limit]
+        lines = ['{:<24}{:>10}{:>12}{:>12}{:>12}'.format(
+            by[:-1], 'calls', 'total ms', 'self ms', 'bytes')]
+        for key, s in rows:
+            lines.append('{:<24}{:>10}{:>12.3f}{:>12.3f}{:>12}'.format(
+                key, s.calls, s.total * 1e3, s.self * 1e3, s.bytes))
+        return '\n'.join(lines)
+
+    def export_trace(self, fp):
+        '''Writes the recorded trace events as Chrome trace event JSON.
+
+        :param file fp: Text file to write into.
+        '''
+        json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, fp)
@@ -0,0 +1,424 @@
+'''Compact binary format for documents and components, without pickle.
+
+A file holds, after a fixed header, the table of component classes, a
+flat table of nodes in document order, a table of deduplicated strings
+and a blob of encoded properties. All integers are little-endian.
+
+* Header: magic ``DCFY``, format version (u16), number of classes (u16),
+  number of nodes (u64), number of strings (u64), then the offsets
+  (u64) of the class table, node table, string index and value blob.
+* Class table: one u32 string index per class, naming the class as
+  ``module:name``. Classes are only looked up in imported modules.
+* Node table: one 24 bytes record per node: class (u16), flags (u8),
+  padding (u8), number of children (u32), number of nodes in the
+  subtree including the node (u32), string index of the value (u32)
+  and offset of the encoded attributes in the value blob (u64).
+  The children of a node follow it, so a subtree can be skipped.
+* String index: ``n + 1`` offsets (u64) into the string data, which
+  follows it as UTF-8.
+* Value blob: tagged values. ``N``, ``T`` and ``F`` are None, True and
+  False, ``i`` an int64, ``I`` a larger int as a decimal string, ``f``
+  a float64, ``s`` a string index (u32), ``l`` a list and ``d`` a dict,
+  each with a u32 count followed by the items.
+
+The links between components are not stored, they follow from the
+order of the nodes. Lazy children are expanded when dumping.
+'''
+import mmap
+import struct
+import sys
+from functools import partial
+
+from docify.lib import components as c
+from docify.lib.document import Document
+
+__all__ = ['dump', 'dumps', 'load', 'loads', 'VERSION']
+
+MAGIC = b'DCFY'
+VERSION = 1
+
+_header = struct.Struct('<4sHHQQQQQQ')
+_record = struct.Struct('<HBxIIIQ')
+_u32 = struct.Struct('<I')
+_i64 = struct.Struct('<q')
+_f64 = struct.Struct('<d')
+_offsets = struct.Struct('<QQ')
+
+# Flags of a node: its value is a string, its value is its only child,
+# it has encoded attributes, it has a list of children.
+_TEXT, _NODE, _DATA, _COMPOSITE = 1, 2, 4, 8
+
+# State of a component which is not encoded as its attributes.
+_links = frozenset(('parent', 'prev', 'next', 'components', 'value'))
+
+
+def _name(cls):
+    return '{}:{}'.format(cls.__module__, cls.__name__)
+
+
+class _Writer(object):
+
+    def __init__(self):
+        self.strings = {}
+        self.classes = {}
+        self.nodes = bytearray()
+        self.values = bytearray()
+        self.count = 0
+
+    def string(self, value):
+        try:
+            return self.strings[value]
+        except KeyError:
+            self.strings[value] = len(self.strings)
+            return self.strings[value]
+
+    def value(self, v):
+        out = self.values
+        if hasattr(v, 'tolist'):
+            v = v.tolist()
+        if v is None:
+            out += b'N'
+        elif v is True or v is False:
+            out += b'T' if v else b'F'
+        elif isinstance(v, int):
+            if -2 ** 63 <= v < 2 ** 63:
+                out += b'i' + _i64.pack(v)
+            else:
+                out += b'I' + _u32.pack(self.string(str(v)))
+        elif isinstance(v, float):
+            out += b'f' + _f64.pack(v)
+        elif isinstance(v, str):
+            out += b's' + _u32.pack(self.string(v))
+        elif isinstance(v, (list, tuple)):
+            out += b'l' + _u32.pack(len(v))
+            for x in v:
+                self.value(x)
+        elif isinstance(v, dict):
+            out += b'd' + _u32.pack(len(v))
+            for k, x in v.items():
+                self.value(k)
+                self.value(x)
+        else:
+            raise TypeError('Cannot serialize {!r}'.format(v))
+
+    def plan(self, cls):
+        '''Returns the index of a class and the names of the attributes
+        of its instances to encode.
+        '''
+        names = []
+        for klass in cls.__mro__:
+            for k in getattr(klass, '__slots__', ()):
+                if k not in _links and k not in ('_props', '_rendered'):
+                    names.append(k)
+        self.classes[cls] = (len(self.classes), names)
+        return self.classes[cls]
+
+    def node(self, obj):
+        cls = type(obj)
+        index, names = self.classes.get(cls) or self.plan(cls)
+        flags, value, data = 0, 0, 0
+        attrs = dict((k, getattr(obj, k)) for k in names if hasattr(obj, k))
+        if getattr(obj, '_props', None) is not None:
+            attrs['_props'] = obj._props
+        attrs.update(getattr(obj, '__dict__', ()))
+        if attrs:
+            flags |= _DATA
+            data = len(self.values)
+            self.value(attrs)
+        v = getattr(obj, 'value', None)
+        if isinstance(v, str):
+            flags |= _TEXT
+            value = self.string(v)
+        elif isinstance(v, c._Component):
+            flags |= _NODE
+        if getattr(obj, 'components', None) is not None:
+            flags |= _COMPOSITE
+        self.nodes += _record.pack(index, flags, 0, 0, value, data)
+        self.count += 1
+        return self.count - 1
+
+    def children(self, obj):
+        if isinstance(getattr(obj, 'value', None), c._Component):
+            return iter((obj.value,))
+        return _expand(getattr(obj, 'components', ()))
+
+    def tree(self, root):
+        '''Adds the nodes of a tree in document order. Walks it
+        iteratively to support any nesting depth.
+        '''
+        stack = [[self.node(root), self.children(root), 0]]
+        while stack:
+            top = stack[-1]
+            x = next(top[1], None)
+            if x is not None:
+                top[2] += 1
+                stack.append([self.node(x), self.children(x), 0])
+                continue
+            stack.pop()
+            struct.pack_into('<II', self.nodes, top[0] * _record.size + 4,
+                             top[2], self.count - top[0])
+
+    def write(self, fp):
+        classes = [self.string(_name(cls)) for cls in self.classes]
+        strings = [s.encode('utf-8') for s in self.strings]
+        classes_at = _header.size
+        nodes_at = classes_at + 4 * len(classes)
+        nodes_at += -nodes_at % 8
+        index_at = nodes_at + len(self.nodes)
+        data_at = index_at + 8 * (len(strings) + 1)
+        values_at = data_at + sum(len(s) for s in strings)
+
+        fp.write(_header.pack(
+            MAGIC, VERSION, len(classes), self.count, len(strings),
+            classes_at, nodes_at, index_at, values_at))
+        fp.write(struct.pack('<{}I'.format(len(classes)), *classes))
+        fp.write(b'\0' * (nodes_at - classes_at - 4 * len(classes)))
+        fp.write(self.nodes)
+        offset = 0
+        index = bytearray(struct.pack('<Q', 0))
+        for s in strings:
+            offset += len(s)
+            index += struct.pack('<Q', offset)
+        fp.write(index)
+        for s in strings:
+            fp.write(s)
+        fp.write(self.values)
+
+
+def _expand(components):
+    '''Yields the components, replacing Lazy ones with their children.'''
+    stack = [iter(components)]
+    while stack:
+        for x in stack[-1]:
+            if isinstance(x, c.Lazy):
+                stack.append(iter(x.items()))
+                break
+            yield x
+        else:
+            stack.pop()
+
+
+class _Reader(object):
+
+    def __init__(self, buf, lazy=False, chunk=1024):
+        if len(buf) < _header.size or buf[:4] != MAGIC:
+            raise ValueError('Not a serialized document')
+        (_, version, classes, self.count, strings, classes_at, self.nodes_at,
+         self.index_at, self.values_at) = _header.unpack_from(buf, 0)
+        if version != VERSION:
+            raise ValueError('Unsupported format version {}'.format(version))
+        self.buf = buf
+        self.lazy = lazy
+        self.chunk = chunk
+        self.data_at = self.index_at + 8 * (strings + 1)
+        # Strings are shared between nodes like in compact mode, unless
+        # nodes are loaded lazily, to keep memory flat.
+        self.strings = None if lazy else {}
+        self.classes = [self.resolve(self.string(i)) for i in struct.unpack_from(
+            '<{}I'.format(classes), buf, classes_at)]
+        self.components = [issubclass(cls, c._Component) for cls in self.classes]
+
+    def resolve(self, name):
+        # Only modules already imported are searched, so that loading a
+        # file never runs the code of a module it names
+        module, _, attr = name.partition(':')
+        cls = getattr(sys.modules.get(module), attr, None)
+        if not isinstance(cls, type) or not issubclass(cls, (c._Component, Document)):
+            raise ValueError('Not a component class: {}'.format(name))
+        return cls
+
+    def string(self, i):
+        if self.strings is not None and i in self.strings:
+            return self.strings[i]
+        start, end = _offsets.unpack_from(self.buf, self.index_at + 8 * i)
+        s = self.buf[self.data_at + start:self.data_at + end].decode('utf-8')
+        if self.strings is not None:
+            self.strings[i] = s
+        return s
+
+    def value(self, offset):
+        '''Returns a decoded value and the offset following it.'''
+        buf = self.buf
+        tag = buf[offset:offset + 1]
+        offset += 1
+        if tag == b'N':
+            return None, offset
+        if tag == b'T' or tag == b'F':
+            return tag == b'T', offset
+        if tag == b'i':
+            return _i64.unpack_from(buf, offset)[0], offset + 8
+        if tag == b'f':
+            return _f64.unpack_from(buf, offset)[0], offset + 8
+        n = _u32.unpack_from(buf, offset)[0]
+        offset += 4
+        if tag == b's':
+            return self.string(n), offset
+        if tag == b'I':
+            return int(self.string(n)), offset
+        if tag == b'l':
+            items = []
+            for _ in range(n):
+                x, offset = self.value(offset)
+                items.append(x)
+            return items, offset
+        if tag == b'd':
+            items = {}
+            for _ in range(n):
+                k, offset = self.value(offset)
+                items[k], offset = self.value(offset)
+            return items, offset
+        raise ValueError('Invalid value tag {!r}'.format(tag))
+
+    def record(self, i):
+        return _record.unpack_from(self.buf, self.nodes_at + i * _record.size)
+
+    def node(self, cls, flags, value, data):
+        obj = self.classes[cls].__new__(self.classes[cls])
+        obj._rendered = None
+        if self.components[cls]:
+            obj._props = obj.parent = obj.prev = obj.next = None
+        if flags & _DATA:
+            for k, v in self.value(self.values_at + data)[0].items():
+                setattr(obj, k, v)
+        if flags & _TEXT:
+            obj.value = self.string(value)
+        if flags & _COMPOSITE:
+            obj.components = []
+        return obj
+
+    def tree(self, i):
+        '''Builds the subtree of a node. In lazy mode, the children of
+        nodes with a subtree larger than the chunk are loaded by a Lazy
+        component while formatting.
+        '''
+        record, node = self.record, self.node
+        end = i + record(i)[3]
+        root, stack = None, []
+        while i < end:
+            cls, flags, n, size, value, data = record(i)
+            obj = node(cls, flags, value, data)
+            if stack:
+                # Link to the parent on top of the stack, and pop the
+                # parents which got all their children
+                top = stack[-1]
+                if top[2] is None:
+                    top[0].value = obj
+                else:
+                    obj.parent = top[0]
+                    if top[2]:
+                        top[2][-1].next = obj
+                        obj.prev = top[2][-1]
+                    top[2].append(obj)
+                top[1] -= 1
+                while stack and not stack[-1][1]:
+                    stack.pop()
+            else:
+                root = obj
+            if self.lazy and size > self.chunk and not flags & _NODE:
+                if n:
+                    lazy = c.Lazy(partial(self.children, i))
+                    lazy.parent = obj
+                    obj.components.append(lazy)
+                i += size
+                continue
+            if n:
+                stack.append([obj, n, getattr(obj, 'components', None)])
+            i += 1
+        return root
+
+    def children(self, i):
+        n = self.record(i)[2]
+        i += 1
+        for _ in range(n):
+            yield self.tree(i)
+            i += self.record(i)[3]
+
+
+def dump(node, fp):
+    '''Writes a document or component with its subtree into a binary file.
+    Lazy children are expanded, so an iterator can only be dumped once.
+    Properties and other attributes can hold None, bools, ints, floats,
+    strings, lists, tuples, dicts and arrays with a ``tolist`` method;
+    tuples and arrays are loaded as lists.
+
+    :param Document|Component node: Root of the tree to write.
+    :param file fp: Binary file to write into.
+
+    Example usage: ::
+
+        with open('doc.bin', 'wb') as f:
+            dump(doc, f)
+    '''
+    writer = _Writer()
+    writer.tree(node)
+    writer.write(fp)
+
+
+def dumps(node):
+    '''Returns the binary form of a document or component as bytes.
+    See :func:`dump`.
+
+    :param Document|Component node: Root of the tree to serialize.
+    '''
+    writer = _Writer()
+    writer.tree(node)
+    out = _Buffer()
+    writer.write(out)
+    return bytes(out)
+
+
+class _Buffer(bytearray):
+
+    def write(self, data):
+        self += data
+
+
+def load(fp, lazy=False, chunk=1024):
+    '''Reads a document or component written by :func:`dump`. The file is
+    memory-mapped when possible. Only component classes can be loaded,
+    from modules which are already imported, so import the modules
+    defining custom components before loading. No module is imported
+    and no other code is run.
+
+    In lazy mode, subtrees of at most ``chunk`` nodes are loaded at
+    once, and larger ones are loaded one child at a time from the file
+    by Lazy components while formatting. Formatting with ``copy=False``
+    then holds only the nodes being formatted, so a document larger
+    than memory can be rendered. The file stays mapped as long as the
+    loaded tree is alive.
+
+    :param file fp: Binary file holding only the serialized tree.
+    :param bool lazy: Whether to load large subtrees while formatting.
+        Default is False.
+    :param int chunk: Largest subtree loaded at once in lazy mode.
+        Default is 1024.
+
+    Example usage: ::
+
+        with open('doc.bin', 'rb') as f:
+            doc = load(f, lazy=True)
+        HTML(doc, copy=False).render_to(sys.stdout)
+    '''
+    try:
+        buf = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, EnvironmentError, ValueError):
+        buf = fp.read()
+    root = _Reader(buf, lazy, chunk).tree(0)
+    if not lazy and isinstance(buf, mmap.mmap):
+        buf.close()
+    return root
+
+
+def loads(data, lazy=False, chunk=1024):
+    '''Reads a document or component from bytes returned by :func:`dumps`.
+    See :func:`load`.
+
+    :param bytes data: Serialized tree.
+    :param bool lazy: Whether to load large subtrees while formatting.
+        Default is False.
+    :param int chunk: Largest subtree loaded at once in lazy mode.
+        Default is 1024.
+    '''
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return _Reader(data, lazy, chunk).tree(0)
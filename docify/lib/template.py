@@ -0,0 +1,98 @@
+from copy import deepcopy
+
+from docify import components as c
+
+__all__ = ['Template', 'compile']
+
+
+class Template(object):
+    '''A document rendered once by a formatter around its slots. Rendering
+    it only formats the values of the slots. Use :func:`compile` to create
+    one.
+
+    :param Formatter formatter: Formatter the document was rendered with.
+    :param list parts: Rendered strings around the slots.
+    :param list slots: Slots of the document, in document order.
+    :param function handler: Handler formatting the slots.
+    '''
+
+    def __init__(self, formatter, parts, slots, handler):
+        self.formatter = formatter
+        self.parts = parts
+        self.slots = slots
+        self.handler = handler
+
+    def fill(self, slot, value):
+        '''Returns the formatted value of a slot. Neither the slot nor the
+        value are changed, so a template can be filled concurrently and
+        a component can be given to several templates.
+
+        :param Slot slot: Slot to fill.
+        :param object value: Value of the slot. A copy of a component is
+            linked in place of the slot and formatted, otherwise the value
+            is converted to string like Text does.
+        '''
+        f = self.formatter
+        if isinstance(value, c._Component):
+            # The neighbours of the value are left out of the copy
+            links = value.parent, value.prev, value.next
+            memo = dict((id(x), None) for x in links if x is not None)
+            node = deepcopy(value, memo)
+            node.parent, node.prev, node.next = slot.parent, slot.prev, slot.next
+            return ''.join(f.iterformat(node))
+        node = c.Slot(slot.name)
+        node.value = str(value)
+        node.parent, node.prev, node.next = slot.parent, slot.prev, slot.next
+        output = self.handler(f, node)
+        return output if isinstance(output, str) else f.join(output)
+
+    def render(self, values):
+        '''Renders the template with given values.
+
+        :param dict values: Value of each slot by name.
+        '''
+        output = [self.parts[0]]
+        for slot, part in zip(self.slots, self.parts[1:]):
+            output.append(self.fill(slot, values[slot.name]))
+            output.append(part)
+        return ''.join(output)
+
+
+def compile(document, formatter, cite=True):
+    '''Renders the static parts of a document containing Slot components
+    once, and returns a Template to render it with different values.
+    The output of the template is identical to rendering the document with
+    the values in place of the slots. Components given as values are
+    formatted in place, but their neighbours are formatted as if they were
+    Text, so they can differ where the type of a sibling matters, e.g. for
+    Markdown line gaps.
+
+    :param Document document: Document to compile. It is copied.
+    :param type formatter: Formatter class to render with.
+    :param bool cite: Whether to add the grumpy citation. Default is True.
+
+    Example usage: ::
+
+        tmpl = compile(Document(H1('Report for ', Slot('name'))), HTML)
+        tmpl.render({'name': 'Alice'})
+    '''
+    # The copy is rendered by a formatter marking the slots, and their
+    # values are formatted by another one with the usual handlers
+    scan = formatter(document, cite=cite)
+    f = formatter(scan.doc, cite=False, copy=False)
+    f.prepare()
+    handler = f.handler(c.Slot)
+    parts, slots, chunks = [], [], []
+
+    @scan.handles(c.Slot)
+    def mark(self, obj):
+        parts.append(''.join(chunks))
+        del chunks[:]
+        slots.append(obj)
+        return ''
+
+    scan.prepare()
+    for x in scan.iterformat(scan.doc):
+        chunks.append(x)
+    parts.append(''.join(chunks))
+    return Template(f, parts, slots, handler)
@@ -1,12 +1,15 @@
+import re
 from setuptools import setup, find_packages
 from codecs import open
 from os import path
 
 
-VERSION = 'v0.4'
-
 here = path.abspath(path.dirname(__file__))
 
+# Get the version from the package without importing it
+with open(path.join(here, 'docify', '__init__.py'), encoding='utf-8') as f:
+    VERSION = re.search(r"__version__ = '([^']+)'", f.read()).group(1)
+
 # Get the long description from the README file
 with open(path.join(here, 'README.md'), encoding='utf-8') as f:
     long_description = f.read()
@@ -48,6 +51,9 @@ setup(
     ],
     platforms=['Any'],
     keywords='documents generator writer',
-    packages=find_packages(exclude=['contrib', 'docs', 'tests', 'examples']),
-    install_requires=[]
+    packages=find_packages(exclude=['contrib', 'docs', 'tests', 'examples', 'benchmarks']),
+    install_requires=[],
+    entry_points={
+        'console_scripts': ['docify=docify.lib.cli:main'],
+    }
 )
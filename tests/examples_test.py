@@ -1,6 +1,6 @@
 import os
 import sys
-from subprocess import Popen, PIPE
+from subprocess import Popen
 
 
 EXAMPLES = [
@@ -8,27 +8,22 @@ EXAMPLES = [
     '1_readme'
 ]
 
-FORMATS = {
-    'markdown': 'result.md',
-    'html': 'result.html',
-    'htmlbootstrap': 'result.withbootstrap.html',
-    'raw': 'result.raw.txt'
-}
+FORMATS = ['markdown', 'html', 'htmlbootstrap', 'raw']
 
 if __name__ == '__main__':
 
+    docpaths = []
     for e in EXAMPLES:
         examplepath = os.path.join('examples', e)
         docpath = os.path.join(examplepath, 'doc.py')
+        docpaths.append(docpath)
 
         sys.stdout.write('\n* ' + docpath + ' -------------\n')
 
         assert Popen(['python', docpath]).wait() == 0
-        for f in FORMATS:
-            resultpath = os.path.join(examplepath, FORMATS[f])
-            p = Popen(['python', docpath, f], stdout=PIPE)
-            stdout, _ = p.communicate()
-            assert p.returncode == 0
-
-            with open(resultpath, 'wb') as f:
-                f.write(stdout)
+
+    # Render every example into every format in a single process
+    args = ['python', '-m', 'docify', '-o', '{dir}/result{ext}']
+    for f in FORMATS:
+        args += ['-f', f]
+    assert Popen(args + docpaths).wait() == 0
@@ -9,6 +9,11 @@ class HTMLBootstrapTest(unittest.TestCase):
     def test_create(self):
         print(HTMLBootstrap(doc))
 
+    def test_copy_free(self):
+        before = repr(doc)
+        self.assertEqual(str(HTMLBootstrap(doc, copy=False)), str(HTMLBootstrap(doc)))
+        self.assertEqual(repr(doc), before)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
 from doc import doc
+from docify import Document, components as c
 from docify.formatters.markdown import Markdown
 
 
@@ -9,6 +10,46 @@ class MarkdownTest(unittest.TestCase):
     def test_create(self):
         print(Markdown(doc))
 
+    def test_copy_free(self):
+        before = repr(doc)
+        self.assertEqual(str(Markdown(doc, copy=False)), str(Markdown(doc)))
+        self.assertEqual(repr(doc), before)
+
+    def test_iter_render(self):
+        f = Markdown(doc)
+        self.assertEqual(''.join(f.iter_render(size=16)), f.render())
+
+    def test_columnar(self):
+        def render(table):
+            return str(Markdown(Document(c.P('a'), table, 'b')))
+
+        for headers in (['Field', 'Value'], None):
+            columns = [['x', 'y_*z*_', c.B('<b>')], [1, '<2>', 3]]
+            table = c.Table.from_columns(headers, columns)
+            self.assertEqual(render(table), render(table.to_table()))
+            rows = [('x', 1), ('y_*z*_', '<2>'), (c.B('<b>'), 3)]
+            self.assertEqual(render(c.Table.from_rows(headers, rows)),
+                             render(table.to_table()))
+        self.assertEqual(render(c.Table.from_columns(None, [])), render(c.Table()))
+
+    def test_lazy(self):
+        def build(children):
+            rows = [c.Tr(c.Td(i), c.Td(c.B(i * 2))) for i in range(3)]
+            items = [c.Li('item %d' % i) for i in range(3)]
+            return Document(
+                c.P('a'),
+                *(children([c.P('b'), 'c']) + [
+                    c.Ul(c.Li('first'), *children(items)),
+                    c.Ol(*children(items[:2])),
+                    c.Table(c.Tr(c.Th('x'), c.Th('y')), *children(rows))] +
+                  children([c.H2('d')])))
+
+        eager = str(Markdown(build(lambda x: x)))
+        f = Markdown(build(lambda x: [c.Lazy(iter(x))]), copy=False)
+        self.assertEqual(f.render(), eager)
+        self.assertRaises(RuntimeError, f.render)
+        self.assertEqual(str(Markdown(build(lambda x: [c.Lazy(x)]))), eager)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import docify
+from docify import formatters
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+
+class EntryPoint(object):
+
+    def __init__(self, name, target):
+        self.name = name
+        self.target = target
+        self.loaded = 0
+
+    def load(self):
+        self.loaded += 1
+        return self.target
+
+
+class RegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = dict(formatters._registry)
+        self.entry_points = formatters._entry_points
+
+    def tearDown(self):
+        formatters._registry.clear()
+        formatters._registry.update(self.registry)
+        formatters._loaded.clear()
+        formatters._scanned[0] = False
+        formatters._entry_points = self.entry_points
+
+    def test_builtin(self):
+        self.assertIs(docify.get_formatter('markdown'), Markdown)
+        self.assertIs(docify.get_formatter('html'), HTML)
+        self.assertIn('htmlbootstrap', formatters.names())
+
+    def test_register(self):
+        formatters.register('md', Markdown)
+        self.assertIs(docify.get_formatter('md'), Markdown)
+        formatters.register('md', 'docify.formatters.html:HTML')
+        self.assertIs(docify.get_formatter('md'), HTML)
+
+    def test_entry_points(self):
+        rst = EntryPoint('rst', Markdown)
+        html = EntryPoint('html', Markdown)
+        formatters._entry_points = lambda: [rst, html]
+        self.assertIs(docify.get_formatter('html'), HTML)
+        self.assertFalse(formatters._scanned[0])
+        self.assertIs(docify.get_formatter('rst'), Markdown)
+        self.assertIs(docify.get_formatter('rst'), Markdown)
+        self.assertEqual((rst.loaded, html.loaded), (1, 0))
+        self.assertIs(docify.get_formatter('html'), HTML)
+
+    def test_unknown(self):
+        formatters._entry_points = lambda: []
+        with self.assertRaises(KeyError) as e:
+            docify.get_formatter('pdf')
+        self.assertIn('markdown', e.exception.args[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import sys
+import unittest
+
+from docify import Document, components as c
+from docify.formatters.html import HTML
+
+# asyncio isn't in the standard library of Python 3.3
+if sys.version_info >= (3, 5):
+    import asyncio
+
+
+class Writer(object):
+
+    def __init__(self):
+        self.chunks = []
+        self.drains = 0
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def drain(self):
+        self.drains += 1
+        return asyncio.sleep(0)
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'requires Python 3.5+')
+class AsyncTest(unittest.TestCase):
+
+    def test_render_async(self):
+        doc = Document(*[c.P('Paragraph {}'.format(i)) for i in range(500)])
+        f = HTML(doc, copy=False)
+        writer = Writer()
+        ticks = []
+
+        def tick():
+            ticks.append(len(writer.chunks))
+            loop.call_soon(tick)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.call_soon(tick)
+            loop.run_until_complete(f.render_async(writer, size=1024))
+        finally:
+            loop.close()
+
+        self.assertEqual(b''.join(writer.chunks), f.render().encode('utf-8'))
+        self.assertEqual(writer.drains, len(writer.chunks))
+        self.assertGreater(len(set(ticks)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
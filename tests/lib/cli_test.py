@@ -0,0 +1,106 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from docify import Document, components as c
+from docify.lib.cli import main
+from docify.lib.serialize import dump
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+SOURCE = '''from docify import Document, components as c
+
+doc = Document(c.H1('Hello'), c.P('From ', c.B('a script')))
+
+if __name__ == '__main__':
+    raise SystemExit('Not run by the CLI')
+'''
+
+
+class CLITest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.script = os.path.join(self.path, 'script.py')
+        with open(self.script, 'w') as f:
+            f.write(SOURCE)
+        self.binary = os.path.join(self.path, 'binary.bin')
+        with open(self.binary, 'wb') as f:
+            dump(Document(c.P('Serialized')), f)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def run_main(self, *args):
+        log = io.StringIO()
+        status = main(list(args), log=log)
+        return status, log.getvalue()
+
+    def read(self, name):
+        with open(os.path.join(self.path, 'out', name)) as f:
+            return f.read()
+
+    def test_render(self):
+        for jobs in ('1', '2'):
+            output = os.path.join(self.path, 'out', '{name}{ext}')
+            status, log = self.run_main(
+                '-f', 'html', '-f', 'markdown', '-j', jobs, '-o', output,
+                self.script, self.binary)
+            self.assertEqual(status, 0)
+            doc = Document(c.H1('Hello'), c.P('From ', c.B('a script')))
+            self.assertEqual(self.read('script.html'), str(HTML(doc)) + '\n')
+            self.assertEqual(self.read('script.md'), str(Markdown(doc)) + '\n')
+            self.assertEqual(self.read('binary.html'),
+                             str(HTML(Document(c.P('Serialized')))) + '\n')
+            self.assertEqual(log.count('written'), 4 if jobs == '1' else 0)
+            self.assertEqual(log.count('unchanged'), 0 if jobs == '1' else 4)
+            self.assertIn('2 inputs', log)
+
+    def test_errors(self):
+        empty = os.path.join(self.path, 'empty.py')
+        open(empty, 'w').close()
+        status, log = self.run_main(
+            '-o', os.path.join(self.path, 'out', '{name}{ext}'), empty, self.script)
+        self.assertEqual(status, 1)
+        self.assertIn('defines no Document', log)
+        self.assertIn('script.html written', log)
+
+    def test_watch(self):
+        empty = os.path.join(self.path, 'empty.py')
+        open(empty, 'w').close()
+        sleeps = []
+
+        def sleep(seconds):
+            # Changes the script after the first run, then stops after
+            # one check, like Ctrl-C
+            sleeps.append(seconds)
+            if len(sleeps) == 1:
+                with open(self.script, 'a') as f:
+                    f.write('doc.add(c.P("Changed"))\n')
+            else:
+                raise KeyboardInterrupt
+
+        original, time.sleep = time.sleep, sleep
+        try:
+            status, log = self.run_main(
+                '-w', '--interval', '0.01', '-o',
+                os.path.join(self.path, 'out', '{name}{ext}'),
+                self.script, self.binary, empty)
+        finally:
+            time.sleep = original
+        self.assertEqual(status, 1)
+        self.assertEqual(sleeps, [0.01, 0.01])
+        first, watch = log.split('3 inputs in')
+        self.assertEqual(first.count('load'), 2)
+        self.assertEqual(watch.count('load'), 1)
+        self.assertIn('script.py', watch)
+        self.assertNotIn('binary', watch)
+        self.assertNotIn('empty', watch)
+        self.assertIn('Changed', self.read('script.html'))
+
+
+if __name__ == '__main__':
+    unittest.main()
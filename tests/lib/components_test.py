@@ -0,0 +1,119 @@
+import array
+import copy
+import pickle
+import unittest
+from decimal import Decimal
+
+from docify import Document, components as c
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+
+class ComponentsTest(unittest.TestCase):
+
+    def test_compact(self):
+        with c.compact():
+            doc = Document(c.Table(*[c.Tr(c.Td(i % 2), c.Td('OK')) for i in range(10)]))
+            a = c.A('link', href='#')
+        self.assertEqual(str(Markdown(doc)), str(Markdown(copy.deepcopy(doc))))
+
+        rows = doc.components[0].components
+        self.assertIs(rows[0].components[0].components[0].value,
+                      rows[2].components[0].components[0].value)
+        self.assertEqual(a.props, {'href': '#'})
+
+    def test_slots(self):
+        p = c.P('text')
+        self.assertFalse(hasattr(p, '__dict__'))
+        self.assertIsNone(p._props)
+        p.props['class'] = 'lead'
+        self.assertEqual(p.props, {'class': 'lead'})
+
+        doc = Document(p, c.A('link', href='#'))
+        for clone in (copy.deepcopy(doc), pickle.loads(pickle.dumps(doc))):
+            self.assertEqual(repr(clone), repr(doc))
+            self.assertEqual(clone.components[0].props, {'class': 'lead'})
+            self.assertIs(clone.components[0].next, clone.components[1])
+
+    def test_depth(self):
+        li = c.Li('leaf')
+        ul = c.Ul(li)
+        self.assertEqual(li.depth, 1)
+        doc = Document(c.Section(ul))
+        self.assertEqual((doc.depth, ul.depth, li.depth), (0, 2, 3))
+        self.assertIn('\n' + ' ' * 16 + "Text('leaf')", repr(doc))
+
+    def test_concat(self):
+        def parts():
+            return [c.I('a'), c.Nbsp(), 'b', c.Span('c', c.B('d')), 'e']
+
+        a = parts()
+        added = a[0] + a[1] + a[2] + a[3] + a[4]
+        b = parts()
+        joined = c.Span.join(b)
+        d = parts()
+        extended = d[0]
+        for x in d[1:]:
+            extended += x
+
+        self.assertEqual(repr(joined), repr(added))
+        self.assertEqual(repr(extended), repr(added))
+        self.assertIs(joined.components[-1].prev, joined.components[-2])
+
+    def test_lazy(self):
+        calls = []
+
+        def rows():
+            calls.append(1)
+            return (c.Tr(c.Td(i)) for i in range(3))
+
+        doc = Document(c.Table(c.Lazy(rows)))
+        html = str(HTML(doc))
+        self.assertEqual(str(HTML(doc, copy=False)), html)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(html.count('<tr>'), 3)
+        self.assertEqual(doc.components[0].components[0].source, rows)
+
+    def test_formats(self):
+        ints = [1000, -2, 30000]
+        floats = [1234.5, float('nan'), 0.125]
+        expected = [('1,000', '1,234.50'), ('-2', '-'), ('30,000', '0.12')]
+
+        table = c.Table.from_columns(
+            ['n', 'x'], [ints, floats], formats={'n': ',', 1: ',.2f'}, nan='-')
+        self.assertEqual(list(table.cells(size=2)), expected)
+        table = c.Table.from_columns(
+            None, [array.array('q', ints), array.array('d', floats)],
+            formats=[',', ',.2f'], nan='-')
+        self.assertEqual(list(table.cells()), expected)
+        table = c.Table.from_rows(None, [(None, 1.5), (c.B('x'), 2)], nan='-')
+        self.assertEqual(repr(list(table.cells())), repr([('-', '1.5'), (c.B('x'), '2')]))
+        values = [Decimal('0.125'), Decimal('2.675'), 0.125]
+        table = c.Table.from_columns(None, [values], formats=['.2f'])
+        self.assertEqual(list(table.cells()), [(format(x, '.2f'),) for x in values])
+
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('numpy is not installed')
+        table = c.Table.from_columns(
+            None, [numpy.array(ints), numpy.array(floats)],
+            formats=[',', '.2f'], nan='-')
+        self.assertEqual(list(table.cells(size=2)),
+                         [('1,000', '1234.50'), ('-2', '-'), ('30,000', '0.12')])
+        table = c.Table.from_rows(None, numpy.array([ints, floats]).T)
+        self.assertEqual(list(table.cells()), [
+            ('1000.0', '1234.5'), ('-2.0', 'nan'), ('30000.0', '0.125')])
+        # Only int and float64 values are converted to Python numbers
+        columns = [numpy.array([0.1, 2.675], dtype='float32'),
+                   numpy.array(['2020-01-02', 'NaT'], dtype='datetime64[D]'),
+                   numpy.array([True, False])]
+        for formats in ([None] * 3, ['.2f', None, None]):
+            table = c.Table.from_columns(None, columns, formats=formats)
+            self.assertEqual(list(table.cells()), list(zip(*[
+                [str(x) if f is None else format(x, f) for x in column]
+                for column, f in zip(columns, formats)])))
+
+
+if __name__ == '__main__':
+    unittest.main()
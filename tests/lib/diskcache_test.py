@@ -0,0 +1,144 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from functools import partial
+
+from docify import Document, components as c
+from docify.lib.diskcache import DiskCache
+from docify.lib.escape import Escaper
+from docify.formatters.html import HTML
+from docify.formatters.html_bootstrap import HTMLBootstrap
+from docify.formatters.markdown import Markdown
+
+
+def doc(i=0):
+    return Document(
+        c.H1('Report {}'.format(i)),
+        c.P('Some ', c.B('text'), cls='intro'),
+        c.Ul(*[c.Li('Item {}'.format(j)) for j in range(10)]))
+
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_render(self):
+        cache = DiskCache(self.path)
+        for formatter in (HTML, HTMLBootstrap, Markdown):
+            for copy in (True, False):
+                expected = str(formatter(doc(), copy=copy))
+                self.assertEqual(cache.render(formatter(doc(), copy=copy)), expected)
+        # HTML and HTMLBootstrap give the same output for this document,
+        # but are cached apart, and copy doesn't change the output
+        self.assertEqual(cache.stats()['entries'], 3)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+        out = io.StringIO()
+        cache.render_to(HTML(doc()), out, size=16)
+        self.assertEqual(out.getvalue(), str(HTML(doc())))
+        self.assertEqual(cache.hits, 4)
+
+    def test_key(self):
+        cache = DiskCache(self.path)
+        key = cache.key(HTML(doc()))
+        self.assertEqual(cache.key(HTML(doc(), copy=False)), key)
+        self.assertNotEqual(cache.key(HTML(doc(), cite=False)), key)
+        self.assertNotEqual(cache.key(HTML(doc(1))), key)
+        self.assertNotEqual(cache.key(Markdown(doc())), key)
+        changed = doc()
+        changed.components[1].props['cls'] = 'other'
+        self.assertNotEqual(cache.key(HTML(changed)), key)
+        f = HTML(doc())
+        f.tmpl = '<main>{}</main>'
+        self.assertNotEqual(cache.key(f), key)
+        self.assertEqual(cache.key(Markdown(doc())), cache.key(Markdown(doc())))
+
+    def test_key_handlers(self):
+        cache = DiskCache(self.path)
+        f1, f2, f3 = HTML(doc()), HTML(doc()), HTML(doc())
+        f1.handlers[c.P] = lambda self, obj: '<p>A</p>'
+        f2.handlers[c.P] = lambda self, obj: '<p>B</p>'
+        f3.handlers[c.P] = lambda self, obj: '<p>A</p>'
+        self.assertNotEqual(cache.key(f1), cache.key(f2))
+        self.assertEqual(cache.key(f1), cache.key(f3))
+        self.assertIn('<p>A</p>', cache.render(f1))
+        self.assertIn('<p>B</p>', cache.render(f2))
+
+        # Classes of the same name, e.g. a class edited between runs
+        def edited(code):
+            class Edited(HTML):
+                escaper = Escaper('<', [('<', '&#60;')])
+                if code:
+                    def handle_text(self, obj):
+                        return obj.value.upper()
+            return Edited
+
+        key = cache.key(edited(False)(doc()))
+        self.assertEqual(cache.key(edited(False)(doc())), key)
+        self.assertNotEqual(cache.key(edited(True)(doc())), key)
+        self.assertNotEqual(cache.key(HTML(doc())), key)
+        f = HTML(doc())
+        f.handlers[c.P] = partial(lambda self, obj: '<p>A</p>')
+        self.assertIsNone(cache.key(f))
+
+    def test_bypass(self):
+        cache = DiskCache(self.path)
+        lazy = Document(c.Ul(c.Lazy(c.Li(i) for i in range(3))))
+        expected = str(HTML(Document(c.Ul(*[c.Li(i) for i in range(3)])), copy=False))
+        self.assertEqual(cache.render(HTML(lazy, copy=False)), expected)
+        self.assertEqual((cache.bypasses, cache.stats()['entries']), (1, 0))
+
+    def test_evict(self):
+        size = len(str(HTML(doc(0))).encode('utf-8'))
+        cache = DiskCache(self.path, maxsize=size * 3)
+        for i in range(10):
+            cache.render(HTML(doc(i)))
+            os.utime(cache._file(cache.key(HTML(doc(i)))), (i, i))
+        stats = cache.stats()
+        self.assertLessEqual(stats['size'], size * 3)
+        self.assertGreater(stats['evictions'], 0)
+        # Most recently used entries are kept
+        cache.render(HTML(doc(9)))
+        self.assertEqual(cache.hits, 1)
+        cache.render(HTML(doc(0)))
+        self.assertEqual(cache.misses, 11)
+
+    def test_interrupted(self):
+        cache = DiskCache(self.path)
+        chunks = cache.iter_render(HTML(doc()), size=0)
+        next(chunks)
+        chunks.close()
+        self.assertEqual(cache.stats()['entries'], 0)
+        self.assertEqual(os.listdir(self.path), [os.listdir(self.path)[0]])
+        self.assertEqual(os.listdir(os.path.join(self.path, os.listdir(self.path)[0])), [])
+
+    def test_stale(self):
+        # Temporary files left by a crash are removed once stale, and
+        # count towards the size until then
+        cache = DiskCache(self.path, maxsize=10 ** 6, stale=60)
+        cache.render(HTML(doc()))
+        directory = os.path.join(self.path, 'ab')
+        os.makedirs(directory)
+        old, new = os.path.join(directory, '.tmpold'), os.path.join(directory, '.tmpnew')
+        for path in (old, new):
+            with open(path, 'w') as f:
+                f.write('x' * 1000)
+        os.utime(old, (0, 0))
+        size = cache.stats()['size']
+        cache.prune()
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+        self.assertEqual(cache.size, size + 1000)
+        cache.clear()
+        self.assertEqual(cache.stats()['entries'], 0)
+        self.assertTrue(os.path.exists(new))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import re
+import threading
+import unittest
+
+from docify import Document, components as c
+from docify.lib.escape import Escaper, HTML_ESCAPER, MARKDOWN_ESCAPER
+from docify.lib.formatter import handles
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+try:
+    from html import escape
+except ImportError:
+    from cgi import escape
+
+
+SAMPLES = [
+    '', 'plain', 'a < b & c > d', '&amp;', '<<>>', 'snake_case', '*bold*',
+    '_a_ b_c *d', 'x\0y', 'caf\xe9 & cr\xe8me']
+
+
+class EscapeTest(unittest.TestCase):
+
+    def test_html(self):
+        for x in SAMPLES:
+            self.assertEqual(HTML_ESCAPER(x), escape(x, quote=False))
+        self.assertEqual(HTML_ESCAPER.bulk(SAMPLES),
+                         [escape(x, quote=False) for x in SAMPLES])
+        self.assertEqual(HTML_ESCAPER.bulk(SAMPLES[:-2]),
+                         [escape(x, quote=False) for x in SAMPLES[:-2]])
+
+    def test_markdown(self):
+        for x in SAMPLES:
+            self.assertEqual(MARKDOWN_ESCAPER(x), re.sub(
+                r'((([_*]).+?\3[^_*]*)*)([_*])', r'\g<1>\\\\\g<4>', x))
+
+    def test_cache(self):
+        escaper = Escaper('<', [('<', '&lt;')], maxsize=2)
+        for x in ('a', '<1', '<2', '<1', '<3'):
+            escaper(x)
+        self.assertEqual(list(escaper.cache), ['<1', '<3'])
+        self.assertEqual(escaper.bulk(['<', c.B('x')])[0], '&lt;')
+
+    def test_short_chars(self):
+        self.assertEqual(Escaper('').escape('a < b'), 'a < b')
+        self.assertEqual(Escaper('&', [('&', '&amp;')])('R&D'), 'R&amp;D')
+        self.assertEqual(Escaper('&<', [('&', '&amp;'), ('<', '&lt;')])('<&'),
+                         '&lt;&amp;')
+
+    def test_subtree(self):
+        doc = Document(c.P('a < b', c.B('c & d')), c.Ul(c.Li('e')))
+        escaped = HTML_ESCAPER.subtree(doc)
+        self.assertEqual(sorted(escaped.values()),
+                         ['a &lt; b', 'c &amp; d', 'e'])
+
+    def test_tables(self):
+        # Rows of plain cells are escaped by the table at once, and
+        # rendered like other rows
+        class Plain(HTML):
+            @handles(c.Table)
+            def handle_table(self, obj):
+                return self.element('table', obj.components, obj._props)
+
+        class PlainMarkdown(Markdown):
+            @handles(c.Table)
+            def handle_table(self, obj):
+                return self.wrap(obj, '')
+
+        cell = c.Td('props')
+        cell.props['class'] = 'x'
+        doc = Document(c.Table(
+            c.Tr(c.Th('a_b'), c.Th('c')),
+            c.Tr(c.Td('1 < 2'), c.Td('*x*')),
+            c.Tr(c.Td(c.B('b')), c.Td('R&D')),
+            c.Tr(c.Td(c.Slot('s')), cell),
+            c.Tr(c.Td('x', 'y'), c.Td()),
+            c.Tr(),
+            c.Tr(c.Lazy([c.Td('lazy')]))), 'after')
+        for formatter, plain in ((HTML, Plain), (Markdown, PlainMarkdown)):
+            self.assertEqual(str(formatter(doc)), str(plain(doc)))
+
+    def test_threads(self):
+        escaper = Escaper('<', [('<', '&lt;')], maxsize=8)
+        errors = []
+
+        def run(n):
+            try:
+                for i in range(2000):
+                    value = '<{}'.format((i * n) % 20)
+                    if escaper(value) != '&lt;' + value[1:]:
+                        errors.append(value)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(1, 5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(escaper.cache), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
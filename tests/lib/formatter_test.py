@@ -0,0 +1,106 @@
+import sys
+import unittest
+
+from docify import Document, components as c
+from docify.lib.formatter import Formatter, handles
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+
+class Note(c.Paragraph):
+    pass
+
+
+class Plain(Formatter):
+
+    @handles(Document, c.Paragraph)
+    def handle_composite(self, obj):
+        return ''.join(map(self.f, self.children(obj)))
+
+    @handles(c.Text)
+    def handle_text(self, obj):
+        return obj.value
+
+
+class Shout(Plain):
+
+    def handle_text(self, obj):
+        return obj.value.upper()
+
+
+class Legacy(Plain):
+
+    def update_handlers(self):
+        super(Legacy, self).update_handlers()
+
+        @self.handles(c.Text)
+        def handle_text(self, obj):
+            return '[{}]'.format(obj.value)
+
+
+def deep(n):
+    doc = Document()
+    node = c.Blockquote()
+    doc.add(node)
+    for i in range(n):
+        child = c.Ul(c.Li(str(i)))
+        node.add(child)
+        node = child
+    return doc
+
+
+class FormatterTest(unittest.TestCase):
+
+    def test_subclass_override(self):
+        doc = Document(c.P('a'), c.P('b'))
+        self.assertEqual(str(Plain(doc, cite=False)), 'ab')
+        self.assertEqual(str(Shout(doc, cite=False)), 'AB')
+
+    def test_instance_handlers(self):
+        doc = Document(c.P('a'), c.P('b'))
+        self.assertEqual(str(Legacy(doc, cite=False)), '[a][b]')
+
+    def test_handlers_per_instance(self):
+        doc = Document(c.P('a'))
+        expected = HTML(doc, cite=False).render()
+        f1 = HTML(doc, cite=False)
+        f1.handlers[c.P] = lambda self, obj: '<p>A</p>'
+        f2 = HTML(doc, cite=False)
+        f2.handlers[c.P] = lambda self, obj: '<p>B</p>'
+        self.assertIn('<p>A</p>', f1.render())
+        self.assertIn('<p>B</p>', f2.render())
+        self.assertEqual(HTML(doc, cite=False).render(), expected)
+        f1.handlers[c.P] = lambda self, obj: '<p>C</p>'
+        self.assertIn('<p>C</p>', f1.render())
+        self.assertIn('<p>a</p>', expected)
+
+    def test_handlers_without_prepare(self):
+        HTML(Document(c.P('a'))).render()
+        f = HTML(Document(c.P('a')))
+        f.handlers[c.P] = lambda self, obj: '<p>A</p>'
+        self.assertEqual(f.format(c.P('b')), '<p>A</p>')
+        f.handlers[c.P] = lambda self, obj: '<p>B</p>'
+        self.assertEqual(f.format(c.P('b')), '<p>B</p>')
+        self.assertEqual(HTML(Document()).format(c.P('b')), '<p>b</p>')
+
+    def test_component_subclass(self):
+        self.assertEqual(
+            str(HTML(Document(Note('a')))), str(HTML(Document(c.P('a')))))
+        self.assertEqual(
+            str(Markdown(Document(Note('a'), 'b'))),
+            str(Markdown(Document(c.P('a'), 'b'))))
+
+    def test_iterative(self):
+        doc = deep(50)
+        for formatter in (HTML, Markdown):
+            f = formatter(doc, copy=False)
+            self.assertEqual(f.render(), f.format(doc))
+
+    def test_iterative_deep(self):
+        doc = deep(sys.getrecursionlimit() * 2)
+        self.assertIn('<li>0</li>', HTML(doc, copy=False).render())
+        self.assertTrue(repr(doc).startswith('Document(\n    Blockquote('))
+
+
+if __name__ == '__main__':
+    unittest.main()
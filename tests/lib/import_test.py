@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+import unittest
+
+# Budget of `import docify`, in milliseconds, generous for slow machines
+BUDGET = 50.0
+
+SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import docify
+elapsed = time.perf_counter() - start
+after = set(sys.modules)
+docify.get_formatter('html')
+formatter = set(sys.modules) - after
+import json
+print(json.dumps({'ms': elapsed * 1e3, 'after': sorted(after),
+                  'formatter': sorted(formatter)}))
+'''
+
+
+def run():
+    out = subprocess.check_output([sys.executable, '-c', SCRIPT])
+    return json.loads(out.decode('utf-8'))
+
+
+class ImportTest(unittest.TestCase):
+
+    def test_budget(self):
+        times = sorted(run()['ms'] for _ in range(3))
+        self.assertLess(times[1], BUDGET)
+
+    def test_lazy(self):
+        result = run()
+        for name in ('re', 'copy', 'docify.formatters.html',
+                     'docify.formatters.markdown'):
+            self.assertNotIn(name, result['after'])
+        self.assertIn('docify.formatters.html', result['formatter'])
+        self.assertNotIn('docify.formatters.markdown', result['formatter'])
+
+
+if __name__ == '__main__':
+    unittest.main()
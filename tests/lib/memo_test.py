@@ -0,0 +1,61 @@
+import unittest
+
+from docify import Document, components as c
+from docify.lib.memo import RenderCache
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+
+def report():
+    return Document(
+        c.H1('Report'),
+        c.Section(c.P('Intro ', c.B('text')), c.Ul(c.Li('a'), c.Li('b'))),
+        c.Section(c.Table(c.Tr(c.Th('x')), c.Tr(c.Td(1)))),
+        'Trailing text')
+
+
+class RenderCacheTest(unittest.TestCase):
+
+    def check(self, doc, mutate):
+        for formatter in (HTML, Markdown):
+            cache = RenderCache()
+            f = formatter(doc, copy=False, cache=cache)
+            self.assertEqual(f.render(), str(formatter(doc)))
+            mutate(doc)
+            self.assertEqual(f.render(), str(formatter(doc)))
+
+    def test_add(self):
+        doc = report()
+        cache = RenderCache()
+        f = HTML(doc, copy=False, cache=cache)
+        f.render()
+        f.render()
+        self.assertEqual((cache.hits, cache.misses), (1, len(cache)))
+        doc.components[1].components[0].add(c.I('more'))
+        misses = cache.misses
+        self.assertEqual(f.render(), str(HTML(doc)))
+        # doc, section, paragraph, its previous last child and the new one
+        self.assertEqual(cache.misses - misses, 5)
+
+    def test_siblings(self):
+        self.check(report(), lambda doc: doc.add(c.P('New')))
+        self.check(report(), lambda doc: doc.components[1].add('x'))
+
+    def test_move(self):
+        self.check(report(), lambda doc: doc.components[1].components[1].add(
+            c.Ul(c.Li('nested'))))
+        self.check(report(), lambda doc: doc.components[1].components[1].components[0].add(
+            doc.components[2].components[0]))
+
+    def test_maxsize(self):
+        doc = report()
+        cache = RenderCache(maxsize=50)
+        for _ in range(2):
+            f = Markdown(doc, cite=False, copy=False, cache=cache)
+            self.assertEqual(f.render(), str(Markdown(doc, cite=False)))
+            self.assertLessEqual(cache.size, cache.maxsize)
+            self.assertGreater(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from docify import Document, components as c
+from docify.lib.memory import measure, memory_stats
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+
+def doc():
+    return Document(
+        c.H1('Title'),
+        c.P('See ', c.A('the link', href='https://some.link.com')),
+        c.Ul(*[c.Li('Item {}'.format(i)) for i in range(5)]))
+
+
+class MemoryTest(unittest.TestCase):
+
+    def test_stats(self):
+        stats = doc().memory_stats()
+        self.assertEqual(stats['nodes'], 17)
+        self.assertEqual(stats['depth'], 3)
+        self.assertEqual(stats['fanout'], 5)
+        self.assertEqual(stats['classes']['ListItem']['count'], 5)
+        self.assertEqual(stats['classes']['Text']['count'], 7)
+        self.assertEqual(sum(x['bytes'] for x in stats['classes'].values()),
+                         stats['bytes'])
+        self.assertEqual(sum(stats['shares'].values()), stats['bytes'])
+        for share in ('objects', 'links', 'text', 'props', 'children'):
+            self.assertGreater(stats['shares'][share], 0)
+        self.assertEqual(stats['renders'], {})
+
+    def test_deep(self):
+        node = c.Span('leaf')
+        for _ in range(5000):
+            node = c.Span(node)
+        stats = Document(node).memory_stats()
+        self.assertEqual(stats['depth'], 5002)
+        self.assertEqual(stats['fanout'], 1)
+
+    def test_shared(self):
+        with c.compact():
+            shared = Document(*[c.P('same text') for _ in range(100)])
+        normal = Document(*[c.P(''.join(['same', ' text'])) for _ in range(100)])
+        self.assertLess(shared.memory_stats()['shares']['text'],
+                        normal.memory_stats()['shares']['text'])
+
+    @unittest.skipIf(tracemalloc is None, 'requires tracemalloc')
+    def test_renders(self):
+        renders = doc().memory_stats([HTML, Markdown], cite=False)['renders']
+        self.assertEqual(sorted(renders), ['HTML', 'Markdown'])
+        for stats in renders.values():
+            self.assertGreater(stats['allocated'], 0)
+            self.assertGreaterEqual(stats['peak'], stats['allocated'])
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertRaises(TypeError, memory_stats, c.P('x'), [HTML])
+
+    @unittest.skipIf(tracemalloc is None, 'requires tracemalloc')
+    def test_measure(self):
+        result = measure(doc, [HTML], copy=False)
+        self.assertGreater(result['build']['allocated'], 0)
+        self.assertGreater(result['HTML']['peak'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+from docify import Document, components as c
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+
+def sections(n):
+    doc = Document()
+    for i in range(n):
+        doc.add(c.Section(c.H2('Section {}'.format(i)), c.P('Text ', c.B(i))))
+        doc.add('Inline {}'.format(i))
+        doc.add(c.Table(c.Tr(c.Th('x'), c.Th('y')), c.Tr(c.Td(i), c.Td(i * 2))))
+    return doc
+
+
+class ParallelTest(unittest.TestCase):
+
+    def test_render_parallel(self):
+        doc = sections(50)
+        for formatter in (HTML, Markdown):
+            f = formatter(doc, copy=False)
+            self.assertEqual(f.render_parallel(workers=2), f.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import io
+import json
+import unittest
+
+from docify import Document, components as c
+from docify.lib.profiling import Profiler
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+
+def doc():
+    return Document(
+        c.H1('Title'),
+        c.Blockquote(c.Blockquote('nested', c.B('bold'))),
+        c.Ul(*[c.Li('Item {}'.format(i)) for i in range(5)]))
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def test_stats(self):
+        for formatter in (HTML, Markdown):
+            profiler = Profiler()
+            output = formatter(doc(), cite=False, profiler=profiler).render()
+            self.assertEqual(output, str(formatter(doc(), cite=False)))
+
+            types = profiler.types
+            self.assertEqual(types['Document'].calls, 1)
+            self.assertEqual(types['Document'].bytes, len(output))
+            self.assertEqual(types['ListItem'].calls, 5)
+            self.assertEqual(types['Text'].calls, 8)
+            self.assertEqual(types['Blockquote'].calls, 2)
+            self.assertLessEqual(types['Blockquote'].total, types['Document'].total)
+            self.assertIn('handle_text', profiler.handlers)
+            self.assertIn('ListItem', profiler.report(limit=3) + profiler.report(sort='calls'))
+
+    def test_trace(self):
+        profiler = Profiler(trace=True)
+        HTML(doc(), copy=False, profiler=profiler).render_to(io.StringIO(), size=0)
+        fp = io.StringIO()
+        profiler.export_trace(fp)
+        events = json.loads(fp.getvalue())['traceEvents']
+        self.assertEqual(len(events), sum(s.calls for s in profiler.types.values()))
+        root = [e for e in events if e['name'] == 'Document'][0]
+        for e in events:
+            self.assertGreaterEqual(e['ts'], root['ts'])
+            self.assertLessEqual(e['ts'] + e['dur'], root['ts'] + root['dur'] + 1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
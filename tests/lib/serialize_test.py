@@ -0,0 +1,87 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+from docify import Document, components as c
+from docify.lib.serialize import dump, dumps, load, loads
+from docify.formatters.html import HTML
+from docify.formatters.markdown import Markdown
+
+
+def doc(lazy=True):
+    return Document(
+        c.H1('Title', id='top'),
+        c.P('See ', c.A(c.B('the link'), href='https://some.link.com'), '.'),
+        c.Ul(*[c.Li('Item {}'.format(i)) for i in range(20)]),
+        c.Table(*[c.Tr(c.Td(i), c.Td('same')) for i in range(20)]),
+        c.Table.from_columns(['a', 'b'], [[1, 2], [0.5, None]],
+                             formats={1: '.2f'}, nan='-'),
+        c.P(c.Lazy(['lazy', c.B('child')])) if lazy else c.P('lazy', c.B('child')),
+        c.Slot('name'))
+
+
+class SerializeTest(unittest.TestCase):
+
+    def test_roundtrip(self):
+        data = dumps(doc())
+        loaded = loads(data)
+        self.assertEqual(repr(loaded), repr(doc(lazy=False)))
+        self.assertEqual(loaded.components[0].props, {'id': 'top'})
+        self.assertEqual(loaded.components[-1].name, 'name')
+        self.assertIsInstance(loaded.components[1].components[1].value, c.Bold)
+        for formatter in (HTML, Markdown):
+            self.assertEqual(str(formatter(loaded)), str(formatter(doc())))
+        # Strings are stored once
+        self.assertEqual(data.count(b'same'), 1)
+        self.assertEqual(dumps(loaded), data)
+
+    def test_lazy(self):
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                dump(doc(), f)
+            with open(path, 'rb') as f:
+                loaded = load(f, lazy=True, chunk=4)
+            self.assertIsInstance(loaded.components[0], c.Lazy)
+            for formatter in (HTML, Markdown):
+                for _ in range(2):
+                    self.assertEqual(str(formatter(loaded, copy=False)),
+                                     str(formatter(doc())))
+        finally:
+            os.remove(path)
+
+    def test_component(self):
+        loaded = load(io.BytesIO(dumps(c.P('x', c.B('y')))))
+        self.assertEqual(repr(loaded), repr(c.P('x', c.B('y'))))
+        self.assertIsNone(loaded.parent)
+
+    def test_deep(self):
+        node = c.Span('leaf')
+        for _ in range(5000):
+            node = c.Span(node)
+        loaded = loads(dumps(Document(node)), lazy=True, chunk=100)
+        self.assertEqual(str(HTML(loaded, copy=False)), str(HTML(Document(node), copy=False)))
+
+    def test_errors(self):
+        self.assertRaises(TypeError, dumps, c.P('x', data=object()))
+        self.assertRaises(ValueError, loads, b'not a document')
+        data = bytearray(dumps(c.P('x')))
+        data[4] = 99
+        self.assertRaises(ValueError, loads, bytes(data))
+
+    def test_unimported_module(self):
+        # The module of a class is never imported by loads
+        Zen = type('Zen', (c.P,), {'__module__': 'this'})
+        data = dumps(Document(Zen('x')))
+        imported = 'this' in sys.modules
+        self.assertRaises(ValueError, loads, data)
+        self.assertEqual('this' in sys.modules, imported)
+        Zen.__module__ = __name__
+        globals()['Zen'] = Zen
+        self.assertIsInstance(loads(dumps(Zen('x'))), Zen)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from docify import Document, components as c
+from docify.lib.template import compile
+from docify.formatters.html import HTML
+from docify.formatters.html_bootstrap import HTMLBootstrap
+from docify.formatters.markdown import Markdown
+
+
+def report(value):
+    return Document(
+        c.H1('Report for ', value('name')),
+        c.P('Static *text* & more'),
+        value('intro'),
+        c.Ul(c.Li(value('first')), c.Li('second')),
+        c.Table(
+            c.Tr(c.Th('Field'), c.Th('Value')),
+            c.Tr(c.Td('x'), c.Td(value('x'))),
+            c.Tr(c.Td('y'), c.Td(value('y')))))
+
+
+class TemplateTest(unittest.TestCase):
+
+    def test_render(self):
+        rows = [
+            {'name': 'Alice', 'intro': 'Hi <b>', 'first': 'a_b_c', 'x': 1, 'y': 2.5},
+            {'name': '*Bob*', 'intro': '', 'first': 'R&D', 'x': 'n/a', 'y': '_'},
+        ]
+        for formatter in (HTML, HTMLBootstrap, Markdown):
+            tmpl = compile(report(c.Slot), formatter)
+            self.assertEqual(len(tmpl.slots), 5)
+            for values in rows:
+                expected = str(formatter(report(lambda k: c.Text(values[k]))))
+                self.assertEqual(tmpl.render(values), expected)
+
+    def test_component(self):
+        doc = Document(c.P('Total: ', c.Slot('total')))
+        tmpl = compile(doc, HTML, cite=False)
+        self.assertEqual(
+            tmpl.render({'total': c.B(10)}),
+            str(HTML(Document(c.P('Total: ', c.B(10))), cite=False)))
+
+    def test_values_unchanged(self):
+        doc = Document(c.P('Total: ', c.Slot('total')))
+        html, md = compile(doc, HTML, cite=False), compile(doc, Markdown, cite=False)
+        placed = Document(c.P('a'), c.B('b', c.I('c')), c.P('d'))
+        value = placed.components[1]
+        before = (value.parent, value.prev, value.next, repr(placed))
+        self.assertEqual(
+            html.render({'total': value}),
+            str(HTML(Document(c.P('Total: ', c.B('b', c.I('c')))), cite=False)))
+        self.assertEqual(
+            md.render({'total': value}),
+            str(Markdown(Document(c.P('Total: ', c.B('b', c.I('c')))), cite=False)))
+        self.assertEqual((value.parent, value.prev, value.next, repr(placed)), before)
+        self.assertEqual(value.components[0].parent, value)
+        slot = html.slots[0]
+        html.render({'total': 'x'})
+        self.assertEqual(slot.value, '')
+        self.assertNotIn(c.Slot, html.formatter.handlers)
+
+
+if __name__ == '__main__':
+    unittest.main()